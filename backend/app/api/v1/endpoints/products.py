@@ -1,22 +1,22 @@
 # backend/app/api/v1/endpoints/products.py
 # Main Products API endpoint using real database structure
-from fastapi import APIRouter, Query
-from sqlalchemy import select, MetaData, Table
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal, engine
-from typing import List, Dict, Any, Optional
+from app.core.config import settings
+from app.db.session import run_db
+from app.services.catalog_cache import (catalog_cache, decode_cursor, latest_job_version, latest_job_version_async,
+                                        load_product_list, load_product_list_async, next_page)
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Tuple
+import anyio
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Reflect tables from existing database
-metadata = MetaData()
-Products = Table("products", metadata, autoload_with=engine)
-Stores = Table("stores", metadata, autoload_with=engine)
-StoreBasePrices = Table("store_base_prices", metadata, autoload_with=engine)
-StoreOfferings = Table("storeOfferings", metadata, autoload_with=engine)
-
 @router.get("/health", summary="Health check")
 def health_check():
     """API status check"""
@@ -27,114 +27,139 @@ def test_endpoint():
     """Simple test to check if API is working"""
     return {"message": "Products API is working", "timestamp": "2025-10-18"}
 
+def _http_date(dt: datetime) -> str:
+    # etlJobs times are naive UTC (datetime.utcnow())
+    return format_datetime(dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def _catalog_headers(version: Optional[Tuple], request: Request, content: Optional[str] = None) -> Dict[str, str]:
+    """Cache-Control plus ETag / Last-Modified of a list response as of ETL job `version` (jobId, endTime).
+
+    `content` identifies the data served (the snapshot digest) when the job alone does not.
+    """
+    headers = {"Cache-Control": f"public, max-age={settings.CATALOG_HTTP_MAX_AGE_SECONDS}, "
+                                f"stale-while-revalidate={settings.CATALOG_HTTP_STALE_SECONDS}",
+               # gzipped or not depending on the request
+               "Vary": "Accept-Encoding"}
+    if version is None and content is None:
+        return headers
+    job_id, end_time = version or (None, None)
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha256(f"{job_id}|{end_time}|{content}|{params}".encode()).hexdigest()[:32]
+    headers["ETag"] = f'"{digest}"'
+    if isinstance(end_time, datetime):
+        headers["Last-Modified"] = _http_date(end_time)
+    return headers
+
+
+def _not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """True if the client's If-None-Match / If-Modified-Since still matches `headers`."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = headers.get("ETag")
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return etag is not None and ("*" in tags or etag in tags)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return parsedate_to_datetime(headers["Last-Modified"]) <= since
+    return False
+
+
+def _read_page(db: Session, request: Request, limit: int, category: Optional[str], search: Optional[str],
+               after: Any) -> Tuple[Dict[str, str], Optional[List[Dict[str, Any]]]]:
+    """Validators and entries of one uncached page (entries None when the client's copy is current)."""
+    headers = _catalog_headers(latest_job_version(db), request)
+    if _not_modified(request, headers):
+        return headers, None
+    return headers, load_product_list(db, limit, category, search, after)
+
+
+async def _read_page_async(db: AsyncSession, request: Request, limit: int, category: Optional[str],
+                           search: Optional[str], after: Any) -> Tuple[Dict[str, str], Optional[List[Dict[str, Any]]]]:
+    """_read_page on the async engine."""
+    headers = _catalog_headers(await latest_job_version_async(db), request)
+    if _not_modified(request, headers):
+        return headers, None
+    return headers, await load_product_list_async(db, limit, category, search, after)
+
+
 @router.get("/", summary="Get all products - using real database structure")
-def get_products(
+async def get_products(
+    request: Request,
+    response: Response,
     category: Optional[str] = Query(None, description="Filter by category"),
-    search: Optional[str] = Query(None, description="Search in product names"),
-    limit: int = Query(100, description="Maximum number of products to return")
+    search: Optional[str] = Query(None, description="Search in product names and descriptions (word prefixes)"),
+    fuzzy: bool = Query(False, description="Also match search words within a typo (served from the catalog cache only)"),
+    limit: int = Query(100, description="Maximum number of products to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page")
 ):
     """
     Product list API using actual database structure:
     - products: basic product info
     - store_base_prices: real store-specific prices  
     - storeOfferings: discount information (when available)
+
+    Served from an in-process snapshot (see catalog_cache) that is rebuilt when a
+    newer ETL job completes; with CATALOG_CACHE_ENABLED off, read per request from
+    the price matrix the ETL materializes (one indexed read), or built from the
+    catalog tables when it has not been materialized.
+
+    `category` (exact name, case-insensitive) and `search` (every word must prefix a
+    word of the name or description) are applied server-side and match the same
+    products whether the page comes from the cache's in-memory index or from the
+    database. `fuzzy=true` lets a search word that prefixes nothing match words within
+    a typo of it; only the cached index supports that, so it is ignored with
+    CATALOG_CACHE_ENABLED off.
+
+    Products are listed in productId order. When more follow, the X-Next-Cursor
+    response header holds an opaque cursor; pass it back as `cursor` for the next
+    page (keyset paging: productId > last id, so any page costs the same).
+
+    Responses carry a strong ETag (latest completed ETL job or catalog load, the
+    snapshot's content digest when cached, + query parameters), Last-Modified (the
+    job's endTime) and a public Cache-Control; a matching If-None-Match /
+    If-Modified-Since gets 304 before the list is read.
+
+    Runs on the event loop: uncached reads await their queries on the async engine and
+    assemble the page in the threadpool (run_db).
     """
     try:
-        with SessionLocal() as db:
-            # Get basic product information
-            products_query = select(
-                Products.c.productId,
-                Products.c.productName,
-                Products.c.categoryName,
-                Products.c.description,
-                Products.c.defaultImageUrl,
-                Products.c.basePrice
-            ).limit(limit)
-            
-            products = db.execute(products_query).fetchall()
-            
-            # Get all stores
-            stores_query = select(Stores.c.storeId, Stores.c.storeName)
-            stores = db.execute(stores_query).fetchall()
-            stores_dict = {store.storeId: store.storeName for store in stores}
-            
-            result = []
-            for product in products:
-                # Get store-specific base prices for this product
-                base_prices_query = select(
-                    StoreBasePrices.c.storeId,
-                    StoreBasePrices.c.basePrice
-                ).where(StoreBasePrices.c.productId == product.productId)
-                
-                base_prices = db.execute(base_prices_query).fetchall()
-                base_prices_dict = {bp.storeId: float(bp.basePrice) for bp in base_prices}
-                
-                # Get any discount offerings for this product
-                offerings_query = select(
-                    StoreOfferings.c.storeId,
-                    StoreOfferings.c.price,
-                    StoreOfferings.c.basePrice,
-                    StoreOfferings.c.offerDetails
-                ).where(StoreOfferings.c.productId == product.productId)
-                
-                offerings = db.execute(offerings_query).fetchall()
-                offerings_dict = {off.storeId: off for off in offerings}
-                
-                # Build stores array with real prices
-                stores_info = []
-                special_offer = None
-                
-                for store_id, store_name in stores_dict.items():
-                    # Get base price for this store
-                    base_price = base_prices_dict.get(store_id, float(product.basePrice or 0))
-                    
-                    # Check for discount offering
-                    offering = offerings_dict.get(store_id)
-                    if offering and offering.price:
-                        # There's a discount
-                        final_price = float(offering.price)
-                        original_price = float(offering.basePrice or base_price)
-                        
-                        store_data = {
-                            "brand": store_name,
-                            "price": final_price,
-                            "original_price": original_price
-                        }
-                        
-                        # Set special offer info (first one found)
-                        if special_offer is None and offering.offerDetails:
-                            special_offer = {
-                                "type": offering.offerDetails,
-                                "store": store_name
-                            }
-                    else:
-                        # No discount, use base price
-                        store_data = {
-                            "brand": store_name,
-                            "price": base_price
-                        }
-                    
-                    stores_info.append(store_data)
-                
-                # Create product data
-                product_data = {
-                    "id": product.productId,
-                    "name": product.productName,
-                    "category": product.categoryName,
-                    "description": product.description or "",
-                    "image": product.defaultImageUrl or "",
-                    "stores": stores_info
-                }
-                
-                # Add special offer if any discount exists
-                if special_offer:
-                    product_data["special"] = special_offer
-                
-                result.append(product_data)
-            
-            return result
-            
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        # one extra row tells whether another page follows
+        if settings.CATALOG_CACHE_ENABLED:
+            # served from the in-process snapshot of the latest completed ETL job;
+            # only the very first build blocks, and it runs in the threadpool
+            snap = catalog_cache.snapshot_nowait() or await anyio.to_thread.run_sync(catalog_cache.snapshot)
+            headers = _catalog_headers(snap.version, request, snap.digest)
+            if _not_modified(request, headers):
+                return Response(status_code=304, headers=headers)
+            entries = snap.page(limit + 1, category, search, after, fuzzy)
+        else:
+            headers, entries = await run_db(_read_page_async, _read_page, request, limit + 1, category, search, after)
+            if entries is None:
+                return Response(status_code=304, headers=headers)
+        products, next_cursor = next_page(entries, limit)
+        response.headers.update(headers)
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return products
+
     except Exception as e:
         logger.error(f"Error in get_products: {str(e)}")
         # Return error info for debugging
-        return {"error": str(e), "message": "Database query failed"}
\ No newline at end of file
+        return {"error": str(e), "message": "Database query failed"}
+
+
+@router.get("/cache/stats", summary="Product catalog cache statistics")
+def cache_stats():
+    """Hit/miss/refresh counters and the ETL job the cached catalog was built from"""
+    return {"enabled": settings.CATALOG_CACHE_ENABLED, **catalog_cache.stats()}
@@ -1,10 +1,21 @@
-from fastapi import Depends, APIRouter
+from fastapi import APIRouter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.db.session import run_db
 from app.db.models.user import User
 
 router = APIRouter()
 
+
+def _all_users(db: Session):
+    return db.execute(select(User)).scalars().all()
+
+
+async def _all_users_async(db: AsyncSession):
+    return (await db.execute(select(User))).scalars().all()
+
+
 @router.get("/users")
-def get_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
\ No newline at end of file
+async def get_users():
+    return await run_db(_all_users_async, _all_users)
@@ -52,6 +52,13 @@ class Settings(BaseSettings):
     DB_NAME: str = Field(default="ursaviour", description="Database name")
     DATABASE_URL: Optional[str] = Field(default=None, description="Complete database URL (overrides other DB settings)")
     
+    ASYNC_DB_ENABLED: bool = Field(default=True, description="Serve async read endpoints from the async engine (falls back to the sync engine in a thread when no async driver is installed)")
+    ASYNC_DB_DRIVER: str = Field(default="asyncmy", description="Async MySQL driver for the async engine: asyncmy|aiomysql (SQLite always uses aiosqlite)")
+    ASYNC_DB_POOL_SIZE: int = Field(default=20, description="Async engine connection pool size")
+    ASYNC_DB_MAX_OVERFLOW: int = Field(default=20, description="Async engine connections allowed beyond the pool size")
+
+    SCHEMA_SNAPSHOT_PATH: Optional[str] = Field(default=None, description="Reflected-schema snapshot file (python -m app.db.schema); regenerate after migrations")
+
     # AWS RDS specific settings
     DB_SSL_MODE: str = Field(default="PREFERRED", description="SSL mode for database connection")
     DB_CHARSET: str = Field(default="utf8mb4", description="Database charset")
@@ -75,6 +82,23 @@ class Settings(BaseSettings):
     AWS_REGION: str = "ap-southeast-2"
     S3_BUCKET_NAME: str = "ursaviour-pamphlets"
     S3_PREFIX: str = "prod"
+    ETL_BATCH_SIZE: int = Field(default=1000, description="Rows per multi-row write in bulk ETL mode")
+    ETL_FETCH_WORKERS: int = Field(default=4, description="Threads fetching/parsing upcoming ETL files (1 = sequential)")
+    ETL_PREFETCH_CHUNKS: int = Field(default=4, description="Parsed row chunks buffered per in-flight ETL file")
+    ETL_CHECKPOINT_ROWS: int = Field(default=0, description="Commit and checkpoint the ETL job every N rows (0 = once per file)")
+    ETL_SHARDS: int = Field(default=1, description="Worker processes that parse, map and write the ETL, by file then by productId shard (1 = single process)")
+    ETL_MERGE_MAX_KEYS: int = Field(default=500_000, description="Offerings buffered by the ETL merge stage before it writes them out")
+    ETL_LOG_BATCH_SIZE: int = Field(default=500, description="Pending etlJobLogs entries that trigger a flush")
+    ETL_LOG_FLUSH_SECONDS: float = Field(default=2.0, description="Max age of buffered etlJobLogs entries before a flush")
+    ETL_LOG_MAX_ROW_ERRORS: int = Field(default=100, description="Distinct row-error messages logged per file; the rest are aggregated")
+    ETL_METRICS_HOOK: Optional[str] = Field(default=None, description="Callable 'module:function' that receives ETL file/job metrics records")
+    CATALOG_CACHE_ENABLED: bool = Field(default=True, description="Serve the product list from an in-process snapshot refreshed after ETL jobs")
+    CATALOG_CACHE_CHECK_SECONDS: float = Field(default=5.0, description="Min seconds between background checks for a newer completed ETL job")
+    CATALOG_CACHE_MAX_AGE_SECONDS: float = Field(default=900.0, description="Rebuild the catalog snapshot after this long even without a new ETL job")
+    CATALOG_HTTP_MAX_AGE_SECONDS: int = Field(default=60, description="Cache-Control max-age of product list responses (browsers and the nginx proxy cache)")
+    CATALOG_HTTP_STALE_SECONDS: int = Field(default=300, description="Cache-Control stale-while-revalidate of product list responses")
+    GZIP_MIN_BYTES: int = Field(default=1024, description="Gzip API responses at least this large when the client accepts it")
+    CATALOG_LOAD_DATA_INFILE: bool = Field(default=True, description="Catalog loader uses LOAD DATA LOCAL INFILE on MySQL when the server allows it")
 
     # --- AWS (optional, use IAM role in prod if possible) ---
     AWS_ACCESS_KEY_ID: Optional[SecretStr] = None
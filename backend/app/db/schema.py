@@ -0,0 +1,179 @@
+# backend/app/db/schema.py
+# Lazy, cached reflection of the existing tables (optionally from a serialized snapshot)
+
+import os, pickle, sys, threading
+from typing import Callable, Dict, Iterable, Optional
+from sqlalchemy import MetaData, Table
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import NoSuchTableError
+from app.core.config import settings
+from app.db.session import engine
+
+# Tables the app reflects; a snapshot written by `python -m app.db.schema` covers these
+KNOWN_TABLES = (
+    "products",
+    "productCategories",
+    "stores",
+    "store_base_prices",
+    "storeOfferings",
+    "productPriceMatrix",
+    "etlJobs",
+    "etlJobLogs",
+    "etlIngestManifest",
+)
+
+
+class TablePlan:
+    """Column lookups for one table, computed once instead of on every call."""
+
+    def __init__(self, table: Table):
+        self.table = table
+        self.columns = {c.name: c for c in table.columns}
+        self._first: Dict[tuple, object] = {}
+        self._derived: Dict[str, object] = {}
+
+    def col(self, name: str):
+        return self.columns.get(name)
+
+    def first(self, candidates: Iterable[str]):
+        """First existing column among candidates, or None (memoized per candidate list)."""
+        key = tuple(candidates)
+        if key not in self._first:
+            self._first[key] = next((self.columns[n] for n in key if n in self.columns), None)
+        return self._first[key]
+
+    def existing(self, vals: Dict) -> Dict:
+        """Filter a dict of values to the columns that exist on the table."""
+        return {k: v for k, v in vals.items() if k in self.columns}
+
+    def derived(self, name: str, build: Callable[[Table], object]):
+        """Value computed once from the table by build(table), e.g. a write template."""
+        if name not in self._derived:
+            self._derived[name] = build(self.table)
+        return self._derived[name]
+
+
+def plan_for(table) -> TablePlan:
+    """The TablePlan cached on a Table (or LazyTable) via Table.info."""
+    plan = table.info.get("plan")
+    if plan is None:
+        plan = table.info["plan"] = TablePlan(table)
+    return plan
+
+
+class SchemaRegistry:
+    """Reflects each table on first use and caches it for the life of the process.
+
+    Nothing touches the database at import time. If `snapshot_path` points at a file
+    written by save_snapshot(), tables are loaded from it instead of from
+    information_schema, so workers start without a DB round trip.
+    """
+
+    def __init__(self, bind: Engine, snapshot_path: Optional[str] = None):
+        self.bind = bind
+        self.snapshot_path = snapshot_path
+        self.metadata = MetaData()
+        # fully reflected tables; metadata.tables already lists a table while it is being reflected
+        self._tables: Dict[str, Table] = {}
+        self._missing = set()
+        self._lock = threading.RLock()
+        self._snapshot_loaded = False
+
+    def _load_snapshot(self) -> None:
+        self._snapshot_loaded = True
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        with open(self.snapshot_path, "rb") as f:
+            snap = pickle.load(f)
+        self.metadata = snap["metadata"]
+        self._missing = set(snap.get("missing", ()))
+
+    def table(self, name: str) -> Table:
+        """Reflected table; raises NoSuchTableError if it does not exist."""
+        t = self._tables.get(name)
+        if t is not None:
+            return t
+        with self._lock:
+            if not self._snapshot_loaded:
+                self._load_snapshot()
+            # complete here: tables are only reflected under the lock
+            t = self.metadata.tables.get(name)
+            if t is None:
+                if name in self._missing:
+                    raise NoSuchTableError(name)
+                try:
+                    t = Table(name, self.metadata, autoload_with=self.bind)
+                except NoSuchTableError:
+                    self._missing.add(name)
+                    raise
+            self._tables[name] = t
+            return t
+
+    def has(self, name: str) -> bool:
+        try:
+            self.table(name)
+            return True
+        except NoSuchTableError:
+            return False
+
+    def loaded(self, name: str) -> bool:
+        """True once `name` is known to exist or not, so table()/has() return without I/O."""
+        return name in self._tables or name in self._missing
+
+    def lazy(self, name: str) -> "LazyTable":
+        return LazyTable(self, name)
+
+    def reflect_all(self, names: Iterable[str] = KNOWN_TABLES) -> None:
+        for name in names:
+            self.has(name)
+
+    def save_snapshot(self, path: Optional[str] = None) -> str:
+        path = path or self.snapshot_path
+        if not path:
+            raise ValueError("no snapshot path given")
+        with self._lock:
+            # plans hold Column objects of this process; rebuild them after loading
+            for t in self.metadata.tables.values():
+                t.info.pop("plan", None)
+            with open(path, "wb") as f:
+                pickle.dump({"metadata": self.metadata, "missing": sorted(self._missing)}, f)
+        return path
+
+
+class LazyTable:
+    """Stand-in for a module-level Table that reflects on first attribute access.
+
+    Works anywhere SQLAlchemy accepts a table (select/insert/update/delete) through
+    __clause_element__, and forwards attribute access (c, columns, name, ...).
+    """
+
+    # keep coercion from mistaking the proxy for the Table it forwards to
+    is_clause_element = False
+
+    def __init__(self, registry: SchemaRegistry, name: str):
+        self._registry = registry
+        self._name = name
+
+    def __clause_element__(self) -> Table:
+        return self._registry.table(self._name)
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.table(self._name), attr)
+
+    def exists(self) -> bool:
+        return self._registry.has(self._name)
+
+    def loaded(self) -> bool:
+        return self._registry.loaded(self._name)
+
+    def __repr__(self) -> str:
+        return f"LazyTable({self._name!r})"
+
+
+registry = SchemaRegistry(engine, settings.SCHEMA_SNAPSHOT_PATH)
+
+
+if __name__ == "__main__":
+    # Write a snapshot for SCHEMA_SNAPSHOT_PATH (or the path given): python -m app.db.schema [path]
+    registry.reflect_all()
+    print(registry.save_snapshot(sys.argv[1] if len(sys.argv) > 1 else None))
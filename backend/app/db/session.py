@@ -1,11 +1,16 @@
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+import anyio
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
 DATABASE_URL = settings.database_url()
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+T = TypeVar("T")
+
 
 def get_db():
 	"""Dependency generator that yields a SQLAlchemy Session and ensures it's closed."""
@@ -13,4 +18,54 @@ def get_db():
 	try:
 		yield db
 	finally:
-		db.close()
\ No newline at end of file
+		db.close()
+
+
+def async_database_url(url: str) -> Optional[str]:
+	"""The async-driver form of a sync database URL, or None for backends without one."""
+	u = make_url(url)
+	backend = u.get_backend_name()
+	if backend == "mysql":
+		return u.set(drivername=f"mysql+{settings.ASYNC_DB_DRIVER}").render_as_string(hide_password=False)
+	if backend == "sqlite":
+		return u.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+	return None
+
+
+def _create_async_engine():
+	if not settings.ASYNC_DB_ENABLED:
+		return None, None
+	url = async_database_url(DATABASE_URL)
+	if url is None:
+		return None, None
+	try:
+		from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+		pool = {} if url.startswith("sqlite") else {
+			"pool_size": settings.ASYNC_DB_POOL_SIZE, "max_overflow": settings.ASYNC_DB_MAX_OVERFLOW}
+		bind = create_async_engine(url, pool_pre_ping=True, **pool)
+	except ImportError:
+		# async driver (asyncmy / aiomysql / aiosqlite) not installed
+		return None, None
+	return bind, async_sessionmaker(bind, autoflush=False, expire_on_commit=False)
+
+
+# Async engine and session factory alongside the sync ones (None when unavailable)
+async_engine, AsyncSessionLocal = _create_async_engine()
+
+
+async def run_db(async_fn: Callable[..., Awaitable[T]], sync_fn: Callable[..., T], *args: Any) -> T:
+	"""Read through the database without blocking the event loop.
+
+	On the async engine this awaits async_fn(async_session, *args), whose statements
+	are awaited on the async driver; async_fn keeps CPU-heavy work off the loop itself
+	(anyio.to_thread). Without an async engine it runs sync_fn(session, *args) on a
+	sync session in the threadpool. Both must return the same result.
+	"""
+	if AsyncSessionLocal is not None:
+		async with AsyncSessionLocal() as db:
+			return await async_fn(db, *args)
+
+	def call() -> T:
+		with SessionLocal() as db:
+			return sync_fn(db, *args)
+	return await anyio.to_thread.run_sync(call)
@@ -1,6 +1,7 @@
 # backend/app/main.py
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from sqlalchemy import text
 from app.db.session import engine
 from app.core.config import settings
@@ -32,7 +33,11 @@ app.add_middleware(
     allow_credentials=allow_credentials,
     allow_methods=["*"],
     allow_headers=["*"],
+    # keyset paging of /api/v1/products (see catalog_cache.next_page)
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
+# the full product list is hundreds of KB of repetitive JSON
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_BYTES)
 
 @app.get("/health", include_in_schema=False)
 def health():
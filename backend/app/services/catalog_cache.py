@@ -0,0 +1,597 @@
+# backend/app/services/catalog_cache.py
+# Product list built from the catalog tables, its materialized price matrix, and an in-process snapshot of it
+
+import base64, hashlib, json, threading, time
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+import anyio
+from sqlalchemy import Text, and_, func, insert, literal_column, or_, select, text, type_coerce
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.schema import registry
+from app.db.session import SessionLocal
+from app.services.catalog_search import CatalogIndex, matches, tokens
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# Tables from the existing database, reflected on first use
+Products = registry.lazy("products")
+Stores = registry.lazy("stores")
+StoreBasePrices = registry.lazy("store_base_prices")
+StoreOfferings = registry.lazy("storeOfferings")
+ETLJobs = registry.lazy("etlJobs")
+# added by migration price_matrix_20261017; the list is built from the catalog tables without it
+PriceMatrix = registry.lazy("productPriceMatrix")
+PRICE_MATRIX_STAGING = "productPriceMatrix_staging"
+PRICE_MATRIX_RETIRED = "productPriceMatrix_old"
+
+
+def _by_product(rows) -> Dict[Any, Dict[int, Any]]:
+    """Group (productId, storeId, ...) rows as {productId: {storeId: row}}; later rows win."""
+    out: Dict[Any, Dict[int, Any]] = {}
+    for r in rows:
+        out.setdefault(r.productId, {})[r.storeId] = r
+    return out
+
+
+def _product_entry(product, stores_dict: Dict[int, str], base_prices: Dict[int, Any],
+                   offerings: Dict[int, Any]) -> Dict[str, Any]:
+    """One product of the list response, merged from its base prices and discount offerings."""
+    stores_info = []
+    special_offer = None
+
+    for store_id, store_name in stores_dict.items():
+        # Get base price for this store
+        bp = base_prices.get(store_id)
+        base_price = float(bp.basePrice) if bp is not None else float(product.basePrice or 0)
+
+        # Check for discount offering
+        offering = offerings.get(store_id)
+        if offering and offering.price:
+            # There's a discount
+            store_data = {
+                "brand": store_name,
+                "price": float(offering.price),
+                "original_price": float(offering.basePrice or base_price)
+            }
+
+            # Set special offer info (first one found)
+            if special_offer is None and offering.offerDetails:
+                special_offer = {
+                    "type": offering.offerDetails,
+                    "store": store_name
+                }
+        else:
+            # No discount, use base price
+            store_data = {
+                "brand": store_name,
+                "price": base_price
+            }
+
+        stores_info.append(store_data)
+
+    product_data = {
+        "id": product.productId,
+        "name": product.productName,
+        "category": product.categoryName,
+        "description": product.description or "",
+        "image": product.defaultImageUrl or "",
+        "stores": stores_info
+    }
+
+    # Add special offer if any discount exists
+    if special_offer:
+        product_data["special"] = special_offer
+    return product_data
+
+
+FULLTEXT_INDEX = "ft_products_name_description"
+
+
+def _has_fulltext(dialect: str) -> bool:
+    """MySQL FULLTEXT index over products (productName, description), added by migration product_search_20261017."""
+    if dialect != "mysql":
+        return False
+    return any(ix.name == FULLTEXT_INDEX for ix in Products.indexes)
+
+
+# InnoDB's default FULLTEXT stopwords: never indexed, so MATCH cannot find them
+_FT_STOPWORDS = frozenset((
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for", "from", "how", "i", "in",
+    "is", "it", "la", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where", "who",
+    "will", "with", "und", "www",
+))
+
+
+def _contains(word: str):
+    return or_(Products.c.productName.icontains(word, autoescape=True),
+               Products.c.description.icontains(word, autoescape=True))
+
+
+def _search_clause(dialect: str, search: str):
+    """WHERE clause keeping at least the products whose name or description match `search`.
+
+    A coarse filter: build_product_list then applies catalog_search.matches, the
+    cached index's word-prefix rules, to the rows it returns.
+    """
+    words = tokens(search)
+    if not words:
+        return None
+    if _has_fulltext(dialect):
+        # InnoDB does not index words shorter than innodb_ft_min_token_size (3) or stopwords: LIKE those
+        ft_words = [w for w in words if len(w) >= 3 and w not in _FT_STOPWORDS]
+        clauses = [_contains(w) for w in words if w not in ft_words]
+        if ft_words:
+            clauses.append(text(
+                "MATCH (productName, description) AGAINST (:q IN BOOLEAN MODE)"
+            ).bindparams(q=" ".join(f"+{w}*" for w in ft_words)))
+        return and_(*clauses)
+    return and_(*[_contains(w) for w in words])
+
+
+def _category_clause(dialect: str, col, category: str):
+    """Case-insensitive category match, as the cached index compares categories."""
+    if dialect == "mysql":
+        # the utf8mb4 default collation is case-insensitive already; keeps the categoryName index usable
+        return col == category
+    return func.lower(col) == category.lower()
+
+
+def _products_query(dialect: str, limit: Optional[int], category: Optional[str], search: Optional[str],
+                    after: Any):
+    query = select(
+        Products.c.productId,
+        Products.c.productName,
+        Products.c.categoryName,
+        Products.c.description,
+        Products.c.defaultImageUrl,
+        Products.c.basePrice
+    ).order_by(Products.c.productId)
+    if after is not None:
+        query = query.where(Products.c.productId > after)
+    if category:
+        query = query.where(_category_clause(dialect, Products.c.categoryName, category))
+    clause = _search_clause(dialect, search) if search else None
+    if clause is not None:
+        query = query.where(clause)
+    elif limit is not None:
+        # a search is cut to `limit` after _matching
+        query = query.limit(limit)
+    return query
+
+
+def _matching(products, limit: Optional[int], search: Optional[str]):
+    """Rows of the coarse search query that match `search` word by word, cut to `limit`."""
+    words = list(dict.fromkeys(tokens(search)))
+    if not words:
+        return products
+    out = [p for p in products if matches(words, f"{p.productName or ''} {p.description or ''}")]
+    return out[:limit] if limit is not None else out
+
+
+def _stores_query():
+    return select(Stores.c.storeId, Stores.c.storeName)
+
+
+def _price_queries(product_ids: Optional[List[Any]]):
+    """Store base prices and discount offerings of `product_ids` (all products when None)."""
+    bp_query = select(StoreBasePrices.c.productId, StoreBasePrices.c.storeId, StoreBasePrices.c.basePrice)
+    of_query = select(
+        StoreOfferings.c.productId,
+        StoreOfferings.c.storeId,
+        StoreOfferings.c.price,
+        StoreOfferings.c.basePrice,
+        StoreOfferings.c.offerDetails
+    )
+    if product_ids is not None:
+        bp_query = bp_query.where(StoreBasePrices.c.productId.in_(product_ids))
+        of_query = of_query.where(StoreOfferings.c.productId.in_(product_ids))
+    return bp_query, of_query
+
+
+def _listed_ids(products, limit: Optional[int], category: Optional[str], search: Optional[str],
+                after: Any) -> Optional[List[Any]]:
+    # a full listing reads the price tables whole instead of through a huge IN list
+    if limit is None and not (category or search) and after is None:
+        return None
+    return list({product.productId for product in products})
+
+
+def _assemble(products, stores, bp_rows, of_rows) -> List[Dict[str, Any]]:
+    """Merge the four result sets into list entries (CPU only: async callers run it in a thread)."""
+    stores_dict = {store.storeId: store.storeName for store in stores}
+    base_prices = _by_product(bp_rows)
+    offerings = _by_product(of_rows)
+    return [
+        _product_entry(product, stores_dict, base_prices.get(product.productId, {}),
+                       offerings.get(product.productId, {}))
+        for product in products
+    ]
+
+
+def build_product_list(db: Session, limit: Optional[int] = None, category: Optional[str] = None,
+                       search: Optional[str] = None, after: Any = None) -> List[Dict[str, Any]]:
+    """The products list response in productId order, from four queries regardless of `limit`.
+
+    products, stores, then the base prices and offerings of all listed products in
+    one IN lookup each (or whole-table reads when listing every product); merged in memory.
+    `category` (case-insensitive) and `search` match exactly what the cached snapshot
+    matches without `fuzzy`: the products query narrows the candidates (indexed
+    categoryName; FULLTEXT on MySQL when migrated, LIKE elsewhere) and the word-prefix
+    rules of catalog_search.matches pick the page from them. `after` continues after
+    that productId (keyset paging: a deep page costs the same as the first).
+    Typo tolerance is only available from the cached snapshot.
+    """
+    products = db.execute(_products_query(db.bind.dialect.name, limit, category, search, after)).fetchall()
+    if search:
+        products = _matching(products, limit, search)
+    stores = db.execute(_stores_query()).fetchall()
+    bp_rows = of_rows = ()
+    if products:
+        bp_query, of_query = _price_queries(_listed_ids(products, limit, category, search, after))
+        bp_rows = db.execute(bp_query).fetchall()
+        of_rows = db.execute(of_query).fetchall()
+    return _assemble(products, stores, bp_rows, of_rows)
+
+
+async def _reflected(*tables) -> None:
+    """Reflect tables not yet loaded in the threadpool: reflection is blocking I/O on the sync engine."""
+    if not all(t.loaded() for t in tables):
+        await anyio.to_thread.run_sync(lambda: [t.exists() for t in tables])
+
+
+async def build_product_list_async(db: "AsyncSession", limit: Optional[int] = None, category: Optional[str] = None,
+                                   search: Optional[str] = None, after: Any = None) -> List[Dict[str, Any]]:
+    """build_product_list on an AsyncSession: the same four statements are awaited on the
+    async driver, and the entries are assembled in the threadpool, off the event loop."""
+    await _reflected(Products, Stores, StoreBasePrices, StoreOfferings)
+    dialect = db.bind.dialect.name
+    products = (await db.execute(_products_query(dialect, limit, category, search, after))).all()
+    if search:
+        products = await anyio.to_thread.run_sync(_matching, products, limit, search)
+    stores = (await db.execute(_stores_query())).all()
+    bp_rows = of_rows = ()
+    if products:
+        bp_query, of_query = _price_queries(_listed_ids(products, limit, category, search, after))
+        bp_rows = (await db.execute(bp_query)).all()
+        of_rows = (await db.execute(of_query)).all()
+    return await anyio.to_thread.run_sync(_assemble, products, stores, bp_rows, of_rows)
+
+
+# --- Price matrix (materialized at the end of each ETL job) ---
+
+def _cheapest(entry: Dict[str, Any]) -> Tuple[Optional[str], Optional[float]]:
+    best = min(entry["stores"], key=lambda st: st["price"], default=None)
+    return (best["brand"], best["price"]) if best is not None else (None, None)
+
+
+def materialize_price_matrix(db: Session, job_id=None) -> int:
+    """Rebuild productPriceMatrix from the live catalog tables; returns the rows written.
+
+    One row per product holds its finished list entry (per-store current and original
+    price, the special) plus the cheapest store, so readers need a single indexed read.
+    The rows are written to a shadow table and swapped in, like storeOfferings.
+    """
+    from datetime import datetime
+    from app.services import etl_service as etl
+
+    entries = build_product_list(db)
+    now = datetime.utcnow()
+    shadow = etl.create_shadow_table(db, PriceMatrix, PRICE_MATRIX_STAGING)
+    try:
+        rows = []
+        for position, entry in enumerate(entries):
+            store, price = _cheapest(entry)
+            rows.append(etl._existing_vals(PriceMatrix, {
+                "position": position,
+                "productId": str(entry["id"]),
+                "categoryName": entry["category"],
+                "cheapestStore": store,
+                "cheapestPrice": price,
+                "entry": entry,
+                "jobId": str(job_id) if job_id is not None else None,
+                "builtAt": now,
+            }))
+        for chunk in etl._chunks(rows, settings.ETL_BATCH_SIZE):
+            db.execute(insert(shadow), chunk)
+        etl.swap_shadow_table(db, PriceMatrix, shadow, PRICE_MATRIX_RETIRED)
+    except Exception:
+        etl.drop_shadow_table(db, PRICE_MATRIX_STAGING)
+        raise
+    return len(entries)
+
+
+def _price_matrix_query(dialect: str, limit: Optional[int], category: Optional[str], after: Any, entry):
+    """Statement reading a page of `entry` values in catalog order, or None if the page
+    cannot come from the matrix."""
+    if after is not None and not isinstance(after, str):
+        # matrix productIds are strings: numeric ids would compare as text, page those from products
+        return None
+    q = select(entry)
+    if after is not None:
+        # same order as position (the list is built in productId order), via the productId index
+        q = q.where(PriceMatrix.c.productId > after).order_by(PriceMatrix.c.productId)
+    else:
+        q = q.order_by(PriceMatrix.c.position)
+    if category:
+        q = q.where(_category_clause(dialect, PriceMatrix.c.categoryName, category))
+    if limit is not None:
+        q = q.limit(limit)
+    return q
+
+
+def _published_query():
+    # any row: publish_price_matrix leaves the matrix empty unless a build succeeded
+    return select(literal_column("1")).select_from(PriceMatrix).limit(1)
+
+
+def read_price_matrix(db: Session, limit: Optional[int] = None, category: Optional[str] = None,
+                      after: Any = None) -> Optional[List[Dict[str, Any]]]:
+    """Product list from the price matrix (one read in catalog order), or None if not materialized.
+
+    A page past the end or of an unknown category is [] when the matrix is published;
+    an empty matrix (never materialized, or cleared after a failed build) gives None.
+    """
+    if not PriceMatrix.exists():
+        return None
+    if limit is not None and limit <= 0:
+        return []
+    q = _price_matrix_query(db.bind.dialect.name, limit, category, after, PriceMatrix.c.entry)
+    if q is None:
+        return None
+    entries = db.execute(q).scalars().all()
+    if not entries and db.execute(_published_query()).first() is None:
+        return None
+    return entries
+
+
+def _decode_entries(raw: List[Any]) -> List[Dict[str, Any]]:
+    return [json.loads(v) if isinstance(v, (str, bytes)) else v for v in raw]
+
+
+async def read_price_matrix_async(db: "AsyncSession", limit: Optional[int] = None, category: Optional[str] = None,
+                                  after: Any = None) -> Optional[List[Dict[str, Any]]]:
+    """read_price_matrix on an AsyncSession; the entries' JSON is decoded in the threadpool."""
+    await _reflected(PriceMatrix)
+    if not PriceMatrix.exists():
+        return None
+    if limit is not None and limit <= 0:
+        return []
+    # fetched as text so the driver does not decode every entry on the event loop
+    q = _price_matrix_query(db.bind.dialect.name, limit, category, after,
+                            type_coerce(PriceMatrix.c.entry, Text))
+    if q is None:
+        return None
+    raw = (await db.execute(q)).scalars().all()
+    if not raw and (await db.execute(_published_query())).first() is None:
+        return None
+    return await anyio.to_thread.run_sync(_decode_entries, raw)
+
+
+def load_product_list(db: Session, limit: Optional[int] = None, category: Optional[str] = None,
+                      search: Optional[str] = None, after: Any = None) -> List[Dict[str, Any]]:
+    """The products list response: from the price matrix when materialized, else from the catalog tables."""
+    # the matrix has no text columns: searches go through the products table
+    entries = None if search else read_price_matrix(db, limit, category, after)
+    if entries is None:
+        return build_product_list(db, limit, category, search, after)
+    return entries
+
+
+async def load_product_list_async(db: "AsyncSession", limit: Optional[int] = None, category: Optional[str] = None,
+                                  search: Optional[str] = None, after: Any = None) -> List[Dict[str, Any]]:
+    """load_product_list on an AsyncSession."""
+    entries = None if search else await read_price_matrix_async(db, limit, category, after)
+    if entries is None:
+        return await build_product_list_async(db, limit, category, search, after)
+    return entries
+
+
+# --- Keyset pagination ---
+
+def encode_cursor(product_id: Any) -> str:
+    """Opaque cursor of the page that follows `product_id`."""
+    raw = json.dumps({"after": product_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    """productId a cursor continues after; ValueError if it is not a cursor of ours."""
+    try:
+        after = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["after"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("invalid cursor") from e
+    if isinstance(after, bool) or not isinstance(after, (str, int)):
+        raise ValueError("invalid cursor")
+    return after
+
+
+def next_page(entries: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Split entries read with `limit + 1` into the page and the cursor of the next one (None on the last page)."""
+    if limit <= 0 or len(entries) <= limit:
+        return entries[:max(limit, 0)], None
+    page = entries[:limit]
+    return page, encode_cursor(page[-1]["id"])
+
+
+# --- Snapshot cache ---
+
+def _latest_job_query():
+    if not ETLJobs.exists():
+        return None
+    cols = ETLJobs.c
+    if "endTime" not in cols or "overallStatus" not in cols:
+        return None
+    return (select(cols.jobId, cols.endTime)
+            .where(cols.overallStatus == "success", cols.endTime.isnot(None))
+            .order_by(cols.endTime.desc())
+            .limit(1))
+
+
+def latest_job_version(db: Session) -> Optional[Tuple]:
+    """(jobId, endTime) of the most recently completed ETL job, or None if there is none."""
+    q = _latest_job_query()
+    row = db.execute(q).first() if q is not None else None
+    return tuple(row) if row is not None else None
+
+
+async def latest_job_version_async(db: "AsyncSession") -> Optional[Tuple]:
+    await _reflected(ETLJobs)
+    q = _latest_job_query()
+    row = (await db.execute(q)).first() if q is not None else None
+    return tuple(row) if row is not None else None
+
+
+class CatalogSnapshot:
+    """Immutable product list as of one completed ETL job, with its category/search index."""
+
+    __slots__ = ("version", "products", "ids", "positions", "index", "digest", "built_at", "build_seconds")
+
+    def __init__(self, version: Optional[Tuple], products: List[Dict[str, Any]], build_seconds: float):
+        self.version = version
+        self.products = tuple(products)
+        # products arrive in productId order
+        self.ids = tuple(p["id"] for p in self.products)
+        self.positions = {pid: i for i, pid in enumerate(self.ids)}
+        self.index = CatalogIndex(self.products)
+        # content identity: catalog loads and max_age rebuilds can change the list under the same job
+        self.digest = hashlib.sha256(json.dumps(self.products, separators=(",", ":"), default=str).encode()).hexdigest()
+        self.built_at = time.time()
+        self.build_seconds = build_seconds
+
+    def start_after(self, after: Any) -> int:
+        """Position of the first product after productId `after` (which may no longer exist)."""
+        i = self.positions.get(after)
+        if i is not None:
+            return i + 1
+        try:
+            return bisect_right(self.ids, after)
+        except TypeError:
+            # a cursor of another id type: nothing follows it
+            return len(self.ids)
+
+    def page(self, limit: int, category: Optional[str] = None, search: Optional[str] = None,
+             after: Any = None, fuzzy: bool = False) -> List[Dict[str, Any]]:
+        start = self.start_after(after) if after is not None else 0
+        if not category and not search:
+            return list(self.products[start:start + max(limit, 0)])
+        positions = self.index.search(category, search, fuzzy)
+        if start:
+            positions = positions[bisect_left(positions, start):]
+        return [self.products[p] for p in islice(positions, max(limit, 0))]
+
+
+class CatalogCache:
+    """Read-through cache of the product list, keyed by the latest completed etlJobs job.
+
+    Requests are served from the current snapshot. At most every `check_seconds` a
+    request starts a background check; if a newer job has completed (or the snapshot
+    is older than `max_age`) a new snapshot is built off the request path and swapped
+    in. A failed refresh keeps serving the previous snapshot. Only the very first
+    request (or one after invalidate()) builds synchronously.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 check_seconds: Optional[float] = None, max_age: Optional[float] = None):
+        self.session_factory = session_factory
+        self.check_seconds = settings.CATALOG_CACHE_CHECK_SECONDS if check_seconds is None else check_seconds
+        self.max_age = settings.CATALOG_CACHE_MAX_AGE_SECONDS if max_age is None else max_age
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._build_lock = threading.Lock()
+        self._refreshing = threading.Event()
+        self._checked_at = 0.0
+        self.hits = self.misses = 0
+        self.refreshes = self.refresh_failures = 0
+        self.last_error: Optional[str] = None
+
+    def _build(self) -> CatalogSnapshot:
+        t0 = time.perf_counter()
+        with self.session_factory() as db:
+            version = latest_job_version(db)
+            products = load_product_list(db)
+        snap = CatalogSnapshot(version, products, 0.0)
+        # includes building the search index
+        snap.build_seconds = time.perf_counter() - t0
+        return snap
+
+    def snapshot(self) -> CatalogSnapshot:
+        snap = self._snapshot
+        if snap is None:
+            with self._build_lock:
+                snap = self._snapshot
+                if snap is None:
+                    self.misses += 1
+                    snap = self._snapshot = self._build()
+                    self._checked_at = time.monotonic()
+                    return snap
+        self.hits += 1
+        if time.monotonic() - self._checked_at >= self.check_seconds:
+            self._start_refresh()
+        return snap
+
+    def snapshot_nowait(self) -> Optional[CatalogSnapshot]:
+        """Like snapshot() but never builds on the calling thread: None before the first build."""
+        return self.snapshot() if self._snapshot is not None else None
+
+    def products(self, limit: int, category: Optional[str] = None, search: Optional[str] = None,
+                 after: Any = None, fuzzy: bool = False) -> List[Dict[str, Any]]:
+        return self.snapshot().page(limit, category, search, after, fuzzy)
+
+    def _start_refresh(self) -> None:
+        if self._refreshing.is_set():
+            return
+        with self._build_lock:
+            if self._refreshing.is_set():
+                return
+            self._refreshing.set()
+            self._checked_at = time.monotonic()
+        threading.Thread(target=self.refresh, name="catalog-cache-refresh", daemon=True).start()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuild the snapshot if a newer ETL job completed; returns True if it was replaced."""
+        try:
+            current = self._snapshot
+            if not force and current is not None:
+                with self.session_factory() as db:
+                    version = latest_job_version(db)
+                expired = time.time() - current.built_at >= self.max_age
+                if version == current.version and not expired:
+                    return False
+            snap = self._build()
+            self._snapshot = snap
+            self.refreshes += 1
+            self.last_error = None
+            return True
+        except Exception as e:
+            # keep serving the previous snapshot
+            self.refresh_failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            return False
+        finally:
+            self._checked_at = time.monotonic()
+            self._refreshing.clear()
+
+    def invalidate(self) -> None:
+        """Drop the snapshot; the next request rebuilds it."""
+        self._snapshot = None
+
+    def stats(self) -> Dict[str, Any]:
+        snap = self._snapshot
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / total, 4) if total else None,
+            "refreshes": self.refreshes,
+            "refreshFailures": self.refresh_failures,
+            "lastError": self.last_error,
+            "jobId": snap.version[0] if snap is not None and snap.version else None,
+            "products": len(snap.products) if snap is not None else 0,
+            "ageSeconds": round(time.time() - snap.built_at, 1) if snap is not None else None,
+            "buildSeconds": round(snap.build_seconds, 4) if snap is not None else None,
+        }
+
+
+catalog_cache = CatalogCache()
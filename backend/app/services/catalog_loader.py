@@ -0,0 +1,194 @@
+# backend/app/services/catalog_loader.py
+# Foundational catalog load: products / categories / stores / store_base_prices from the foundational dataset
+
+import csv, json, os, sys, tempfile
+from typing import Dict, Iterable, Iterator, List, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from app.core.config import settings
+from app.db.schema import registry
+from app.db.session import SessionLocal, engine
+from app.services import etl_service as etl
+
+StoreBasePrices = registry.lazy("store_base_prices")
+BASE_PRICES_STAGING = "store_base_prices_staging"
+BASE_PRICES_RETIRED = "store_base_prices_old"
+PRICE_COLUMNS = ("productId", "storeId", "basePrice")
+
+
+def read_catalog(source: str) -> Iterator[Dict[str, str]]:
+    """Rows of a local CSV file, or of a storage key (any source format the ETL reads)."""
+    if os.path.isfile(source):
+        with open(source, encoding="utf-8-sig", newline="") as f:
+            yield from csv.DictReader(f)
+        return
+    yield from etl.fetch_csv_rows(source)
+
+
+def _code(row: Dict[str, str]) -> Optional[str]:
+    return (row.get(etl.BOM_KEY) or row.get("product_id") or "").strip() or None
+
+
+def _product_key() -> str:
+    # same key as the ETL: the catalog code is products.sku when the table has one
+    return "sku" if etl._col(etl.Products, "sku") is not None else "productId"
+
+
+def _load_products(db: Session, rows: List[Dict[str, str]], cache: etl.DimensionCache, seen: set) -> int:
+    """Upsert the products first seen in this chunk (first row of a product wins)."""
+    key = _product_key()
+    new: Dict[str, Dict[str, str]] = {}
+    for r in rows:
+        code = _code(r)
+        if code and code not in seen and code not in new:
+            new[code] = r
+    if not new:
+        return 0
+    seen.update(new)
+    cat_ids = etl.bulk_upsert_categories(db, (r.get("category_name") for r in new.values()), cache)
+    # prices reference products by code: write it to productId too when that column holds it
+    code_id = key == "sku" and etl._code_is_product_id()
+    vals = []
+    for code, r in new.items():
+        image = r.get("default_image_url") or ""
+        vals.append(etl._existing_vals(etl.Products, {
+            **({"productId": code} if code_id else {}),
+            key: code,
+            "productName": r.get("product_name") or code,
+            "categoryName": r.get("category_name"),
+            "categoryId": cat_ids.get(r.get("category_name")),
+            "description": r.get("description") or "",
+            "defaultImageUrl": image,
+            "imageUrl": image,
+            "basePrice": etl._f(r.get("base_price")),
+        }))
+    known = None
+    if key == "sku":
+        # the cache was preloaded with every SKU, so a miss means the product is new
+        known = {(c,) for c in new if cache.get("products", c) is not None}
+    etl._bulk_upsert(db, etl.Products, vals, [key], existing=known)
+    return len(vals)
+
+
+def _price_rows(db: Session, rows: List[Dict[str, str]], cache: etl.DimensionCache) -> List[Dict]:
+    store_ids = etl.bulk_upsert_stores(db, (r.get("store_name") or "Default Store" for r in rows), cache)
+    out = []
+    for r in rows:
+        code = _code(r)
+        if code:
+            store = etl._normalize_store_name(r.get("store_name") or "Default Store")
+            out.append({"productId": code, "storeId": store_ids[store], "basePrice": etl._f(r.get("base_price"))})
+    return out
+
+
+# --- LOAD DATA LOCAL INFILE (MySQL) ---
+
+def _infile_engine():
+    """Engine whose connections may send local files; None when the server refuses them."""
+    if engine.dialect.name != "mysql":
+        return None
+    bind = create_engine(engine.url, connect_args={"local_infile": True}, poolclass=NullPool)
+    try:
+        with bind.connect() as conn:
+            if int(conn.execute(text("SELECT @@GLOBAL.local_infile")).scalar() or 0):
+                return bind
+    except DBAPIError:
+        pass
+    bind.dispose()
+    return None
+
+
+def _load_infile(bind, table: str, path: str) -> int:
+    """LOAD DATA LOCAL INFILE a price CSV into `table`; later rows replace earlier ones per key."""
+    with bind.begin() as conn:
+        r = conn.execute(text(
+            f"LOAD DATA LOCAL INFILE :path REPLACE INTO TABLE {table} "
+            "CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            f"LINES TERMINATED BY '\\n' ({', '.join(PRICE_COLUMNS)})"
+        ), {"path": path})
+        return r.rowcount
+
+
+def _insert_file(db: Session, staging, path: str, size: int) -> None:
+    """Chunked multi-row inserts of a price CSV written for LOAD DATA (its fallback)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = (dict(zip(PRICE_COLUMNS, r)) for r in csv.reader(f))
+        for chunk in etl._chunks(rows, size):
+            etl._bulk_upsert(db, staging, chunk, ["productId", "storeId"])
+            db.commit()
+
+
+def load_catalog(source: str, chunk_size: Optional[int] = None, infile: Optional[bool] = None) -> Dict:
+    """Load the foundational dataset (CSV path or storage key) into the catalog tables.
+
+    Categories, stores and products are upserted chunk by chunk through the ETL's bulk
+    helpers. store_base_prices is rebuilt in a shadow table and swapped in at the end,
+    so readers see either the old price list or the complete new one. On MySQL the
+    prices go in with one LOAD DATA LOCAL INFILE when the server allows local_infile;
+    elsewhere (or if it is refused) they are written as chunked multi-row inserts.
+    The load is recorded as an etlJobs job, so the catalog version (see
+    catalog_cache.latest_job_version) advances with it.
+    """
+    size = chunk_size or settings.ETL_BATCH_SIZE
+    use_infile = settings.CATALOG_LOAD_DATA_INFILE if infile is None else infile
+    stats = {"rows": 0, "products": 0, "prices": 0, "method": "insert"}
+    bind = _infile_engine() if use_infile else None
+    tmp = None
+    with SessionLocal() as db:
+        cache = etl.DimensionCache.preload(db)
+        seen: set = set()
+        staging = etl.create_shadow_table(db, StoreBasePrices, BASE_PRICES_STAGING)
+        job_id = etl.create_job(db, source)
+        try:
+            writer = None
+            if bind is not None:
+                tmp = tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", encoding="utf-8", delete=False)
+                writer = csv.writer(tmp, lineterminator="\n")
+            for rows in etl._chunks(read_catalog(source), size):
+                stats["rows"] += len(rows)
+                stats["products"] += _load_products(db, rows, cache, seen)
+                prices = _price_rows(db, rows, cache)
+                # stores/products are committed before any price row references them
+                if writer is not None:
+                    writer.writerows([p[c] for c in PRICE_COLUMNS] for p in prices)
+                else:
+                    etl._bulk_upsert(db, staging, prices, ["productId", "storeId"])
+                db.commit()
+                stats["prices"] += len(prices)
+
+            if tmp is not None:
+                tmp.close()
+                try:
+                    _load_infile(bind, BASE_PRICES_STAGING, tmp.name)
+                    stats["method"] = "load_data"
+                except DBAPIError:
+                    # e.g. local_infile disabled on the client side after all
+                    _insert_file(db, staging, tmp.name, size)
+            etl.swap_shadow_table(db, StoreBasePrices, staging, BASE_PRICES_RETIRED)
+            etl.publish_price_matrix(db, job_id)
+            # a completed job advances the catalog version: caches and HTTP validators follow the new prices
+            etl.finish_job(db, job_id, stats["rows"], stats["prices"], 0)
+        except Exception:
+            # leave the live store_base_prices untouched
+            etl.drop_shadow_table(db, BASE_PRICES_STAGING)
+            etl.fail_job(db, job_id)
+            raise
+        finally:
+            if tmp is not None:
+                tmp.close()
+                os.unlink(tmp.name)
+            if bind is not None:
+                bind.dispose()
+        stats["jobId"] = job_id
+        stats["stores"] = len(cache.ids["stores"])
+        stats["categories"] = len(cache.ids["categories"])
+    return stats
+
+
+if __name__ == "__main__":
+    # python -m app.services.catalog_loader data/foundational_dataset_v1.csv [chunk_size]
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m app.services.catalog_loader <csv path or storage key> [chunk_size]")
+    print(json.dumps(load_catalog(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None), indent=2))
@@ -0,0 +1,144 @@
+# backend/app/services/catalog_search.py
+# In-memory category and token/trigram search index over a product list (built with each catalog snapshot)
+
+import re, unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+_WORD = re.compile(r"\w+")
+
+# query tokens shorter than this only match whole words (a one-letter prefix matches half the vocabulary)
+MIN_PREFIX = 2
+# typo tolerance: words sharing enough trigrams with a query token that matched nothing
+MIN_FUZZY = 4
+FUZZY_SIMILARITY = 0.5
+MAX_EXPANSIONS = 2000
+
+
+def normalize(text: Optional[str]) -> str:
+    """Case- and accent-insensitive form of `text`."""
+    if not text:
+        return ""
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+
+
+def tokens(text: Optional[str]) -> List[str]:
+    return _WORD.findall(normalize(text))
+
+
+def trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def matches(query_tokens: Sequence[str], text: Optional[str]) -> bool:
+    """Whether `text` matches every query token the way CatalogIndex does without `fuzzy`."""
+    words = set(tokens(text))
+    for token in query_tokens:
+        if len(token) < MIN_PREFIX:
+            if token not in words:
+                return False
+        elif not any(w.startswith(token) for w in words):
+            return False
+    return True
+
+
+class CatalogIndex:
+    """Category and word index over list entries, addressed by their position in the list.
+
+    Words come from the product name and description. A query token matches words it
+    is a prefix of; with `fuzzy`, a token that matches none matches words with trigram
+    similarity of at least FUZZY_SIMILARITY instead (typos). All query tokens must
+    match; results keep list order.
+    """
+
+    def __init__(self, entries: Sequence[Dict[str, Any]]):
+        self.size = len(entries)
+        categories: Dict[str, List[int]] = {}
+        postings: Dict[str, List[int]] = {}
+        for pos, entry in enumerate(entries):
+            categories.setdefault(normalize(entry.get("category")), []).append(pos)
+            text = f"{entry.get('name') or ''} {entry.get('description') or ''}"
+            for word in set(tokens(text)):
+                postings.setdefault(word, []).append(pos)
+        self.categories = {k: array("i", v) for k, v in categories.items()}
+        self.vocab = sorted(postings)
+        self.postings = [array("i", postings[w]) for w in self.vocab]
+        grams: Dict[str, List[int]] = {}
+        for wid, word in enumerate(self.vocab):
+            for g in trigrams(word):
+                grams.setdefault(g, []).append(wid)
+        self.grams = {k: array("i", v) for k, v in grams.items()}
+        self.gram_counts = array("i", (len(trigrams(w)) for w in self.vocab))
+
+    # --- word lookup ---
+    def _prefixed(self, token: str) -> List[int]:
+        if len(token) < MIN_PREFIX:
+            i = bisect_left(self.vocab, token)
+            return [i] if i < len(self.vocab) and self.vocab[i] == token else []
+        out = []
+        i = bisect_left(self.vocab, token)
+        while i < len(self.vocab) and self.vocab[i].startswith(token) and len(out) < MAX_EXPANSIONS:
+            out.append(i)
+            i += 1
+        return out
+
+    def _similar(self, token: str) -> List[int]:
+        if len(token) < MIN_FUZZY:
+            return []
+        query = trigrams(token)
+        shared: Dict[int, int] = {}
+        for g in query:
+            for wid in self.grams.get(g, ()):
+                shared[wid] = shared.get(wid, 0) + 1
+        out = []
+        for wid, n in shared.items():
+            # Dice coefficient over the two trigram sets
+            if 2 * n / (len(query) + self.gram_counts[wid]) >= FUZZY_SIMILARITY:
+                out.append(wid)
+        return out[:MAX_EXPANSIONS]
+
+    def word_ids(self, token: str, fuzzy: bool = False) -> List[int]:
+        return self._prefixed(token) or (self._similar(token) if fuzzy else [])
+
+    # --- queries ---
+    def _matching(self, query: str, fuzzy: bool) -> Optional[Set[int]]:
+        """Positions matching every token of `query` (None for a query without tokens)."""
+        groups = []
+        for token in dict.fromkeys(tokens(query)):
+            ids = self.word_ids(token, fuzzy)
+            if not ids:
+                return set()
+            groups.append(ids)
+        if not groups:
+            return None
+        # intersect starting from the token with the fewest postings
+        groups.sort(key=lambda ids: sum(len(self.postings[i]) for i in ids))
+        result: Optional[Set[int]] = None
+        for ids in groups:
+            hits: Set[int] = set()
+            for i in ids:
+                hits.update(self.postings[i])
+            result = hits if result is None else result & hits
+            if not result:
+                break
+        return result
+
+    def search(self, category: Optional[str] = None, query: Optional[str] = None,
+               fuzzy: bool = False) -> Iterable[int]:
+        """Positions (ascending) of the entries in `category` whose words match `query`."""
+        in_category: Optional[Sequence[int]] = None
+        if category:
+            in_category = self.categories.get(normalize(category), ())
+        matched = self._matching(query, fuzzy) if query else None
+        if matched is None:
+            return range(self.size) if in_category is None else in_category
+        if in_category is not None:
+            if len(in_category) < len(matched):
+                return [p for p in in_category if p in matched]
+            matched &= set(in_category)
+        return sorted(matched)
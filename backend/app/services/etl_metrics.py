@@ -0,0 +1,206 @@
+# backend/app/services/etl_metrics.py
+# Per-stage and per-file ETL timers/counters (persisted on etlJobs / etlJobLogs) and pluggable metrics hooks
+
+import importlib, io, time
+from functools import lru_cache
+from typing import BinaryIO, Callable, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from app.core.config import settings
+
+STAGES = ("list", "fetch", "parse", "map", "write", "publish")
+
+MetricsHook = Callable[[str, Dict], None]
+_hooks: List[MetricsHook] = []
+
+
+def add_hook(fn: MetricsHook) -> None:
+    """Call fn(event, payload) for every "file" and "job" metrics record of later ETL runs."""
+    _hooks.append(fn)
+
+
+def remove_hook(fn: MetricsHook) -> None:
+    if fn in _hooks:
+        _hooks.remove(fn)
+
+
+@lru_cache(maxsize=1)
+def _configured_hook() -> Optional[MetricsHook]:
+    # settings.ETL_METRICS_HOOK = "package.module:function"
+    path = settings.ETL_METRICS_HOOK
+    if not path:
+        return None
+    module, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def hooks() -> List[MetricsHook]:
+    configured = _configured_hook()
+    return _hooks + [configured] if configured is not None else list(_hooks)
+
+
+class FileMetrics:
+    """Timers and counters for one source object (or, with key None, job-level work).
+
+    fetch/parse are recorded by the thread reading the object (a prefetch worker or the
+    writer), map/write by the writer, so their sum can exceed wall time when prefetching.
+    """
+
+    __slots__ = ("key", "seconds", "source_seconds", "bytes_read", "rows_parsed", "rows_skipped",
+                 "rows_loaded", "rows_failed", "statements", "db_seconds")
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        # fetch + parse, as seen by whoever iterates the object's chunks
+        self.source_seconds = 0.0
+        self.bytes_read = 0
+        self.rows_parsed = self.rows_skipped = self.rows_loaded = self.rows_failed = 0
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    def add(self, other: "FileMetrics") -> None:
+        """Add another record of the same object (e.g. from a shard worker process) to this one."""
+        for k, v in other.seconds.items():
+            self.seconds[k] += v
+        for attr in ("source_seconds", "bytes_read", "rows_parsed", "rows_skipped", "rows_loaded", "rows_failed",
+                     "statements", "db_seconds"):
+            setattr(self, attr, getattr(self, attr) + getattr(other, attr))
+
+    def stages(self) -> Dict[str, float]:
+        s = dict(self.seconds)
+        if self.source_seconds:
+            # fetch time is nested in the source time; the rest is CSV/Parquet decoding
+            s["parse"] += max(0.0, self.source_seconds - s["fetch"])
+        return s
+
+    def as_dict(self) -> Dict:
+        return {
+            "stages": {k: round(v, 4) for k, v in self.stages().items()},
+            "bytesRead": self.bytes_read,
+            "rowsParsed": self.rows_parsed,
+            "rowsSkippedZeroRate": self.rows_skipped,
+            "rowsLoaded": self.rows_loaded,
+            "rowsFailed": self.rows_failed,
+            "statements": self.statements,
+            "dbSeconds": round(self.db_seconds, 4),
+        }
+
+
+class _MeteredStream(io.RawIOBase):
+    """Raw stream that adds bytes read and time spent reading to a FileMetrics."""
+
+    def __init__(self, raw: BinaryIO, stats: FileMetrics):
+        self._raw = raw
+        self._stats = stats
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        t0 = time.perf_counter()
+        data = self._raw.read(len(b))
+        self._stats.seconds["fetch"] += time.perf_counter() - t0
+        n = len(data)
+        b[:n] = data
+        self._stats.bytes_read += n
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._raw.close()
+        super().close()
+
+
+def metered(raw: BinaryIO, stats: Optional[FileMetrics]) -> BinaryIO:
+    """Wrap a raw object stream so reads are counted on `stats` (unchanged if stats is None)."""
+    if stats is None:
+        return raw
+    return io.BufferedReader(_MeteredStream(raw, stats), buffer_size=1 << 20)
+
+
+class ETLMetrics:
+    """All timers and counters of one ETL run.
+
+    While track() is active, statements sent on the ETL's own connection are counted
+    (with their DB time) on the file being written, or on the job outside of files.
+    Collection costs a few perf_counter() calls per chunk; with no hook registered
+    emit() does nothing.
+    """
+
+    def __init__(self, job_id: Optional[int] = None):
+        self.job_id = job_id
+        self.job = FileMetrics()
+        self.files: Dict[str, FileMetrics] = {}
+        self.current = self.job
+        self.started = time.perf_counter()
+        self._conn: Optional[Connection] = None
+        self._hooks = hooks()
+
+    @property
+    def hooked(self) -> bool:
+        return bool(self._hooks)
+
+    def file(self, key: str) -> FileMetrics:
+        fm = self.files.get(key)
+        if fm is None:
+            fm = self.files.setdefault(key, FileMetrics(key))
+        return fm
+
+    def begin_file(self, key: str) -> FileMetrics:
+        self.current = self.file(key)
+        return self.current
+
+    def end_file(self, key: str) -> Dict:
+        """Metrics record for a finished file (also handed to the hooks)."""
+        fm = self.files[key]
+        if self.current is fm:
+            self.current = self.job
+        record = {"key": key, **fm.as_dict()}
+        self.emit("file", record)
+        return record
+
+    # --- DB statements ---
+    def track(self, conn: Connection) -> "ETLMetrics":
+        """Count statements on `conn` only: other connections of the engine are not listened to."""
+        self._conn = conn
+        event.listen(conn, "before_cursor_execute", self._before)
+        event.listen(conn, "after_cursor_execute", self._after)
+        return self
+
+    def untrack(self) -> None:
+        if self._conn is not None:
+            event.remove(self._conn, "before_cursor_execute", self._before)
+            event.remove(self._conn, "after_cursor_execute", self._after)
+            self._conn = None
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info["etl_metrics_t0"] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        t0 = conn.info.pop("etl_metrics_t0", None)
+        if t0 is not None:
+            fm = self.current
+            fm.statements += 1
+            fm.db_seconds += time.perf_counter() - t0
+
+    # --- Summary / hooks ---
+    def summary(self) -> Dict:
+        """Job totals: stage times and counters summed over files plus job-level work."""
+        total = FileMetrics()
+        for fm in (self.job, *self.files.values()):
+            for k, v in fm.stages().items():
+                total.seconds[k] += v
+            for attr in ("bytes_read", "rows_parsed", "rows_skipped", "rows_loaded", "rows_failed",
+                         "statements", "db_seconds"):
+                setattr(total, attr, getattr(total, attr) + getattr(fm, attr))
+        return {**total.as_dict(), "files": len(self.files),
+                "wallSeconds": round(time.perf_counter() - self.started, 4)}
+
+    def emit(self, name: str, payload: Dict) -> None:
+        for hook in self._hooks:
+            try:
+                hook(name, {"jobId": self.job_id, **payload})
+            except Exception:
+                # metrics must never fail the load
+                pass
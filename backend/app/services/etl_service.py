@@ -1,47 +1,104 @@
 # backend/app/services/etl_service.py
-# Service: S3 -> CSV -> DB upsert for products / categories / stores / storeOfferings
+# Service: S3/local folder -> CSV -> DB upsert for products / categories / stores / storeOfferings
 
-import io, csv, re
-from typing import Iterable, Dict, Optional, List
-import boto3
-from sqlalchemy import MetaData, Table, select, update, insert, text, delete
+import io, csv, json, re, queue, threading, time
+from array import array
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, Dict, Optional, List, Sequence, Tuple
+from sqlalchemy import JSON, Index, MetaData, String, Table, select, update, insert, text, delete, bindparam, and_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError, NoSuchTableError
 from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.db.schema import plan_for, registry
 from app.db.session import SessionLocal, engine
+from app.services.etl_metrics import ETLMetrics, FileMetrics, metered
+from app.services.etl_storage import LocalStorage, decompress, get_storage, is_parquet_key, is_source_key
 import uuid
 
-# --- S3 helpers ---
-def _s3():
-    # Use env/IAM credentials
-    return boto3.client("s3", region_name=settings.AWS_REGION)
+try:
+    import numpy as np
+except ImportError:  # optional: map_columns falls back to plain Python arithmetic
+    np = None
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for .parquet sources
+    pa = None
+
+# --- Source helpers (S3 or local folder, see etl_storage) ---
 def list_csv_keys(prefix: str) -> List[Dict]:
-    # List *.csv under prefix (non-recursive)
-    s3 = _s3()
-    token = None
-    out: List[Dict] = []
-    while True:
-        params = {"Bucket": settings.S3_BUCKET_NAME, "Prefix": prefix}
-        if token:
-            params["ContinuationToken"] = token
-        resp = s3.list_objects_v2(**params)
-        for o in resp.get("Contents", []):
-            if o["Key"].lower().endswith(".csv"):
-                out.append({"Key": o["Key"], "LastModified": o["LastModified"]})
-        if not resp.get("IsTruncated"):
-            break
-        token = resp.get("NextContinuationToken")
-    return out
+    # List source objects (.csv, .csv.gz, .csv.zst, .parquet) under prefix with LastModified / ETag / Size
+    return get_storage().list_objects(prefix)
+
+def _open_text(key: str, stats: Optional[FileMetrics] = None) -> io.TextIOWrapper:
+    # CSV bytes from the storage backend, decompressed on the fly for .gz/.zst;
+    # with `stats` the raw (compressed) bytes and read time are counted on it
+    return io.TextIOWrapper(decompress(key, metered(get_storage().open(key), stats)), encoding="utf-8")
+
+def fetch_csv_rows(key: str, stats: Optional[FileMetrics] = None) -> Iterable[Dict[str, str]]:
+    # Stream CSV (or Parquet) from the storage backend as Dict rows
+    if is_parquet_key(key):
+        return _parquet_rows(key)
+    return csv.DictReader(_open_text(key, stats))
+
+def fetch_csv_columns(key: str, chunk_size: int, stats: Optional[FileMetrics] = None) -> Iterator[Tuple[int, Dict[str, Sequence[Optional[str]]]]]:
+    """Stream CSV as column chunks: (row count, {header: values}).
+
+    Rows are read exactly like csv.DictReader (blank lines skipped, short rows padded
+    with None) but transposed per chunk so map_columns can work on whole columns.
+    """
+    if is_parquet_key(key):
+        yield from fetch_parquet_columns(key, chunk_size)
+        return
+    reader = csv.reader(_open_text(key, stats))
+    header = next(reader, None)
+    if header is None:
+        return
+    idx = {name: i for i, name in enumerate(header)}  # last duplicate wins, as in DictReader
+    width = len(header)
+    for rows in _chunks(reader, chunk_size):
+        if min(map(len, rows)) < width:
+            rows = [r if len(r) >= width else r + [None] * (width - len(r)) for r in rows if r]
+            if not rows:
+                continue
+        cols = list(zip(*rows))
+        yield len(rows), {name: cols[i] for name, i in idx.items()}
+
+def fetch_parquet_columns(key: str, chunk_size: int) -> Iterator[Tuple[int, Dict[str, Sequence[Optional[str]]]]]:
+    """Stream a Parquet object as column chunks, batch by batch within each row group.
 
-def fetch_csv_rows(key: str) -> Iterable[Dict[str, str]]:
-    # Stream CSV from S3 as Dict rows
-    s3 = _s3()
-    obj = s3.get_object(Bucket=settings.S3_BUCKET_NAME, Key=key)
-    text = io.TextIOWrapper(obj["Body"], encoding="utf-8")
-    return csv.DictReader(text)
+    Only the columns the mappers read are fetched. Values are cast to strings (nulls
+    stay None) so map_row/map_columns treat them exactly like CSV fields.
+    """
+    if pa is None:
+        raise RuntimeError(f"{key}: reading .parquet sources requires the pyarrow package")
+    with closing(get_storage().open_random(key)) as f:
+        pf = pq.ParquetFile(f)
+        names = [n for n in pf.schema_arrow.names if n in SOURCE_COLUMNS]
+        for batch in pf.iter_batches(batch_size=chunk_size, columns=names):
+            cols = {}
+            for name, arr in zip(batch.schema.names, batch.columns):
+                if not pa.types.is_string(arr.type):
+                    arr = pc.cast(arr, pa.string())
+                cols[name] = tuple(arr.to_pylist())
+            yield batch.num_rows, cols
+
+def _parquet_rows(key: str) -> Iterator[Dict[str, Optional[str]]]:
+    for _, cols in fetch_parquet_columns(key, settings.ETL_BATCH_SIZE):
+        names = list(cols)
+        for vals in zip(*cols.values()):
+            yield dict(zip(names, vals))
 
 # --- CSV mappers ---
 BOM_KEY = "\ufeffproduct_id"
+# every source field map_row / map_columns read (Parquet reads only these columns)
+SOURCE_COLUMNS = frozenset((BOM_KEY, "product_id", "id", "store_name", "base_price", "final_price", "discount_type"))
 
 def extract_week_from_key(key: str) -> Optional[int]:
     # e.g., data/no.41week_special.csv -> 41
@@ -90,26 +147,112 @@ def map_row(row: Dict[str, str]) -> Dict:
     }
 
 
-# --- DB reflections (use existing tables as-is) ---
-metadata = MetaData()
-Products       = Table("products",           metadata, autoload_with=engine)
-ProductCats    = Table("productCategories",  metadata, autoload_with=engine)
-Stores         = Table("stores",             metadata, autoload_with=engine)
-StoreOfferings = Table("storeOfferings",     metadata, autoload_with=engine)
-ETLJobLogs     = Table("etlJobLogs",         metadata, autoload_with=engine)
-ETLJobs        = Table("etlJobs",            metadata, autoload_with=engine)
+def _memo(fn: Callable, values: Sequence) -> List:
+    # apply fn once per distinct value (prices and discount labels repeat heavily)
+    table = {v: fn(v) for v in set(values)}
+    return list(map(table.__getitem__, values))
+
+
+def _np_round(x, ndigits: int):
+    """Vectorized round() that returns exactly what Python's round(v, ndigits) would.
+
+    rint(v * 10**n) / 10**n equals Python's correctly rounded result unless v * 10**n
+    lands within float error of a .5 tie (or is huge/non-finite); those few values
+    are recomputed with round() itself.
+    """
+    scale = 10.0 ** ndigits
+    with np.errstate(invalid="ignore", over="ignore"):
+        scaled = x * scale
+        out = np.rint(scaled) / scale
+        frac = np.abs(scaled - np.trunc(scaled))
+        risky = ~np.isfinite(scaled) | (np.abs(frac - 0.5) < 1e-6) | (np.abs(scaled) >= 2.0 ** 50)
+    if risky.any():
+        idx = np.nonzero(risky)[0]
+        out[idx] = [round(v, ndigits) for v in x[idx].tolist()]
+    return out
+
+
+def map_columns(n: int, cols: Dict[str, Sequence[Optional[str]]], discounted_only: bool = False) -> List[Dict]:
+    """Columnar equivalent of map_row for a chunk of `n` rows; output is identical.
+
+    With `discounted_only` rows whose rate is not positive are dropped before any
+    per-row dict is built (the loader skips them anyway).
+
+    Floats are parsed once per distinct string, discount_type is resolved once per
+    distinct label, and the rate/price arithmetic runs over whole arrays (NumPy when
+    installed). Rounding stays on Python's round() so results match map_row exactly.
+
+    The output is still one dict per kept row, because the loader, OfferingMerge and
+    the shard spills all consume mapped dicts; building them is about half of the
+    call. On 300k generated rows (95% discounted) this maps in 0.35-0.6s against
+    0.95-1.06s for map_row, a 1.7-2.7x gain on the map stage only.
+    """
+    none = (None,) * n
+    col = lambda name: cols.get(name, none)
+
+    # row.get(BOM_KEY) or row.get("product_id") or row.get("id"), skipped when the first column is never blank
+    pids = col(BOM_KEY) if BOM_KEY in cols else col("product_id")
+    if not all(pids):
+        pids = [a or b or c for a, b, c in zip(col(BOM_KEY), col("product_id"), col("id"))]
+    stores = col("store_name")
+    if not all(stores):
+        stores = [v or "Default Store" for v in stores]
+    base = _memo(_f, col("base_price"))
+    final = _memo(_f, col("final_price"))
+    dtypes = _memo(lambda v: (v or "").strip(), col("discount_type"))
+    label_rate = {d: _rate(0.0, 0.0, d) for d in set(dtypes)}
+
+    if np is not None and n:
+        b = np.array(base, dtype=np.float64)
+        f = np.array(final, dtype=np.float64)
+        both = (b > 0) & (f > 0)
+        # inf * 0 (100% off an infinite price) and oversized percentages give nan/inf, as in map_row
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            rate_arr = np.where(both, _np_round(np.where(both, (b - f) / b, 0.0), 4), 0.0)
+            if not both.all():
+                labels = np.array([label_rate[d] for d in dtypes], dtype=np.float64)
+                rate_arr = np.where(both, rate_arr, labels)
+            prices_arr = np.where(f > 0, f, _np_round(b * (1 - rate_arr), 2))
+        rates = rate_arr.tolist()
+        prices = prices_arr.tolist()
+    else:
+        rates = [
+            round((bv - fv) / bv, 4) if bv > 0 and fv > 0 else label_rate[d]
+            for bv, fv, d in zip(base, final, dtypes)
+        ]
+        prices = [fv if fv > 0 else round(bv * (1 - r), 2) for bv, fv, r in zip(base, final, rates)]
+
+    return [
+        {
+            "productId": pid,
+            "storeName": store,
+            "basePrice": bv,
+            "price": pv,
+            "offerDetails": d,
+            "rate": r,
+        }
+        for pid, store, bv, pv, d, r in zip(pids, stores, base, prices, dtypes, rates)
+        if not discounted_only or r > 0.0
+    ]
+
+
+# --- DB reflections (use existing tables as-is; reflected lazily on first use) ---
+Products       = registry.lazy("products")
+ProductCats    = registry.lazy("productCategories")
+Stores         = registry.lazy("stores")
+StoreOfferings = registry.lazy("storeOfferings")
+ETLJobLogs     = registry.lazy("etlJobLogs")
+ETLJobs        = registry.lazy("etlJobs")
+# added by migration ingest_manifest_20261017; incremental mode is unavailable without it
+ETLManifest    = registry.lazy("etlIngestManifest")
 
 def _col(t: Table, name: str):
-    return getattr(t.c, name, None)
+    return plan_for(t).col(name)
 
 
 def _find_col_name(t: Table, candidates: List[str]):
     """Return the first matching column object from candidates or None."""
-    for name in candidates:
-        c = getattr(t.c, name, None)
-        if c is not None:
-            return c
-    return None
+    return plan_for(t).first(candidates)
 
 
 def _existing_vals(t: Table, vals: Dict) -> Dict:
@@ -118,11 +261,7 @@ def _existing_vals(t: Table, vals: Dict) -> Dict:
     This prevents INSERT/UPDATE attempts against non-existent columns when the
     source data uses different naming conventions.
     """
-    out: Dict = {}
-    for k, v in vals.items():
-        if _col(t, k) is not None:
-            out[k] = v
-    return out
+    return plan_for(t).existing(vals)
 
 # --- Upserts ---
 
@@ -130,27 +269,115 @@ def _normalize_store_name(name: str) -> str:
     """Return normalized key for dedup (lowercase, strip all spaces)."""
     return re.sub(r"\s+", "", name or "").lower()
 
-def upsert_category(db: Session, name: Optional[str]) -> Optional[int]:
+def _category_cols():
+    id_col = _find_col_name(ProductCats, ["categoryId", "id", "category_id"])
+    name_col = _find_col_name(ProductCats, ["categoryName", "name", "category"])
+    if id_col is None or name_col is None:
+        raise RuntimeError("productCategories table missing categoryId/categoryName columns")
+    return id_col, name_col
+
+
+class DimensionCache:
+    """Run-scoped id lookups for stores, categories and products.
+
+    Keyed the same way the upserts dedup: stores by _normalize_store_name,
+    categories by name, products by SKU. Preloaded once per ETL run; ids
+    inserted during the run are added so later rows never re-query.
+    """
+
+    DIMENSIONS = ("stores", "categories", "products")
+
+    def __init__(self):
+        self.ids: Dict[str, Dict] = {d: {} for d in self.DIMENSIONS}
+        self.hits: Dict[str, int] = {d: 0 for d in self.DIMENSIONS}
+        self.misses: Dict[str, int] = {d: 0 for d in self.DIMENSIONS}
+        # keys added since preload, so entries can be dropped when a savepoint rolls back
+        self._journal: List[Tuple[str, object]] = []
+
+    @classmethod
+    def preload(cls, db: Session) -> "DimensionCache":
+        cache = cls()
+        key_col = _col(Stores, "storeKey")
+        if key_col is not None:
+            cache.ids["stores"].update({r[0]: r[1] for r in db.execute(select(key_col, Stores.c.storeId))})
+        else:
+            for r in db.execute(select(Stores.c.storeId, Stores.c.storeName)):
+                cache.ids["stores"].setdefault(_normalize_store_name(r.storeName), r.storeId)
+        try:
+            id_col, name_col = _category_cols()
+            cache.ids["categories"].update({r[0]: r[1] for r in db.execute(select(name_col, id_col))})
+        except RuntimeError:
+            pass
+        id_col, sku_col = _col(Products, "productId"), _col(Products, "sku")
+        if id_col is not None and sku_col is not None:
+            cache.ids["products"].update({r[0]: r[1] for r in db.execute(select(sku_col, id_col))})
+        return cache
+
+    def get(self, dim: str, key):
+        v = self.ids[dim].get(key)
+        if v is None:
+            self.misses[dim] += 1
+        else:
+            self.hits[dim] += 1
+        return v
+
+    def put(self, dim: str, key, value) -> None:
+        if value is None:
+            return
+        if key not in self.ids[dim]:
+            self._journal.append((dim, key))
+        self.ids[dim][key] = value
+
+    def mark(self) -> int:
+        return len(self._journal)
+
+    def rollback(self, mark: int) -> None:
+        """Forget ids added after `mark` (their INSERTs were rolled back)."""
+        while len(self._journal) > mark:
+            dim, key = self._journal.pop()
+            self.ids[dim].pop(key, None)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            d: {"size": len(self.ids[d]), "hits": self.hits[d], "misses": self.misses[d]}
+            for d in self.DIMENSIONS
+        }
+
+
+def upsert_category(db: Session, name: Optional[str], cache: Optional[DimensionCache] = None) -> Optional[int]:
     """Insert or return existing categoryId by categoryName."""
     if not name:
         return None
+    if cache is not None:
+        hit = cache.get("categories", name)
+        if hit is not None:
+            return hit
 
-    id_col = _col(ProductCats, "categoryId") or _find_col_name(ProductCats, ["id", "category_id"])
-    name_col = _col(ProductCats, "categoryName") or _find_col_name(ProductCats, ["name", "category"])
-
-    if not id_col or not name_col:
-        raise RuntimeError("productCategories table missing categoryId/categoryName columns")
+    id_col, name_col = _category_cols()
 
     q = db.execute(select(id_col).where(name_col == name)).scalar()
-    if q:
-        return q
+    if not q:
+        vals = _existing_vals(ProductCats, {"categoryName": name})
+        r = db.execute(insert(ProductCats).values(vals))
+        q = r.inserted_primary_key[0]
+    if cache is not None:
+        cache.put("categories", name, q)
+    return q
 
-    vals = _existing_vals(ProductCats, {"categoryName": name})
-    r = db.execute(insert(ProductCats).values(vals))
-    return r.inserted_primary_key[0]
+def _code_is_product_id() -> bool:
+    """True if products.productId is the catalog code itself (a string, like the
+    productId of storeOfferings and store_base_prices) rather than a surrogate id."""
+    col = _col(Products, "productId")
+    return col is not None and isinstance(col.type, String)
 
-def upsert_product(db: Session, d: Dict) -> int:
-    """Insert/update product by SKU."""
+
+# the only product column the ETL owns: name, description, image, brand and category come
+# from the catalog load, so the ETL's placeholders only fill products it inserts
+_PRODUCT_UPDATE_COLS = ("basePrice",)
+
+
+def upsert_product(db: Session, d: Dict, cache: Optional[DimensionCache] = None) -> int:
+    """Insert product by SKU, or update the basePrice of an existing one."""
     id_col  = _col(Products, "productId")
     sku_col = _col(Products, "sku")
     name_col= _col(Products, "productName")
@@ -162,10 +389,14 @@ def upsert_product(db: Session, d: Dict) -> int:
     if id_col is None or sku_col is None:
         raise RuntimeError("products table missing productId/sku columns")
 
-    q = db.execute(select(id_col).where(sku_col == d["sku"])).scalar()
-    cat_id = upsert_category(db, d.get("category"))
+    if cache is not None:
+        q = cache.get("products", d["sku"])
+    else:
+        q = db.execute(select(id_col).where(sku_col == d["sku"])).scalar()
+    cat_id = upsert_category(db, d.get("category"), cache)
 
     vals = _existing_vals(Products, {
+        **({"productId": d["sku"]} if _code_is_product_id() else {}),
         "sku": d["sku"],
         "productName": d["name"],
         "description": d.get("description", ""),
@@ -177,34 +408,61 @@ def upsert_product(db: Session, d: Dict) -> int:
     })
 
     if q:
-        db.execute(update(Products).where(id_col == q).values(vals))
+        upd = {k: v for k, v in vals.items() if k in _PRODUCT_UPDATE_COLS}
+        if upd:
+            db.execute(update(Products).where(id_col == q).values(upd))
         return q
     r = db.execute(insert(Products).values(vals))
-    return r.inserted_primary_key[0]
+    new_id = r.inserted_primary_key[0]
+    if cache is not None:
+        cache.put("products", d["sku"], new_id)
+    return new_id
 
-def upsert_store(db: Session, store_name: str) -> int:
+def upsert_store(db: Session, store_name: str, cache: Optional[DimensionCache] = None) -> int:
     """Insert or reuse storeId by normalized name (dedup spaces/case)."""
     norm = _normalize_store_name(store_name)
+    if cache is not None:
+        hit = cache.get("stores", norm)
+        if hit is not None:
+            return hit
 
-    # find existing by normalized comparison in SQL (LOWER(REPLACE(...)))
-    sql = """
-        SELECT storeId, storeName
-        FROM stores
-        WHERE LOWER(REPLACE(storeName,' ',''))
-              = :norm
-        LIMIT 1
-    """
-    row = db.execute(text(sql), {"norm": norm}).first()
-    if row:
-        return row.storeId
-
-    # insert new store with the original display name
-    r = db.execute(insert(Stores).values({"storeName": store_name}))
-    return r.inserted_primary_key[0]
+    key_col = _col(Stores, "storeKey")
+    if key_col is None:
+        # pre-storeKey schema: find existing by normalized comparison in SQL (LOWER(REPLACE(...)))
+        sql = """
+            SELECT storeId, storeName
+            FROM stores
+            WHERE LOWER(REPLACE(storeName,' ',''))
+                  = :norm
+            LIMIT 1
+        """
+        row = db.execute(text(sql), {"norm": norm}).first()
+        if row:
+            store_id = row.storeId
+        else:
+            # insert new store with the original display name
+            r = db.execute(insert(Stores).values({"storeName": store_name}))
+            store_id = r.inserted_primary_key[0]
+    else:
+        # indexed lookup on the persisted normalized key
+        store_id = db.execute(select(Stores.c.storeId).where(key_col == norm)).scalar()
+        if store_id is None:
+            try:
+                with db.begin_nested():
+                    r = db.execute(insert(Stores).values({"storeName": store_name, "storeKey": norm}))
+                store_id = r.inserted_primary_key[0]
+            except IntegrityError:
+                # a concurrent load inserted the same store first; a locking read sees its committed row
+                store_id = db.execute(
+                    select(Stores.c.storeId).where(key_col == norm).with_for_update()
+                ).scalar_one()
+    if cache is not None:
+        cache.put("stores", norm, store_id)
+    return store_id
 
-def upsert_offering(db: Session, d: Dict, store_id: int) -> int:
-    """Upsert storeOfferings by (productId, storeId)."""
-    t = StoreOfferings
+def upsert_offering(db: Session, d: Dict, store_id: int, t: Optional[Table] = None) -> int:
+    """Upsert storeOfferings (or its staging copy `t`) by (productId, storeId)."""
+    t = StoreOfferings if t is None else t
     id_col  = _col(t, "offeringId")
     pid_col = _col(t, "productId")
     sid_col = _col(t, "storeId")
@@ -243,172 +501,1274 @@ def upsert_offering(db: Session, d: Dict, store_id: int) -> int:
     r = db.execute(insert(t).values(vals))
     return r.inserted_primary_key[0]
 
-def log(db: Session, key: str, status: str, message: str = "", job_id: Optional[int] = None):
-    # Build payload only with columns that exist on the ETLJobLogs table
-    payload: Dict = {}
-    # timestamp column commonly exists and may be NOT NULL
-    if _col(ETLJobLogs, "timestamp") is not None:
-        from datetime import datetime
-
-        payload["timestamp"] = datetime.utcnow()
-    # stage column exists in schema (e.g., 'file'|'job')
-    if _col(ETLJobLogs, "stage") is not None:
-        payload["stage"] = "file"
-    # include jobId if present
-    if job_id is not None and _col(ETLJobLogs, "jobId") is not None:
-        payload["jobId"] = job_id
-    # status/message
-    if _col(ETLJobLogs, "status") is not None:
-        payload["status"] = status
-    if _col(ETLJobLogs, "message") is not None:
-        payload["message"] = message
+def _log_plan(t: Table) -> Tuple[Tuple[str, str], ...]:
+    """(column, field) pairs a log entry fills on ETLJobLogs; see ETLLogBuffer."""
+    cols = plan_for(t).columns
+    # timestamp may be NOT NULL; stage is e.g. 'file'|'job'
+    fields = [(c, f) for c, f in (("timestamp", "timestamp"), ("stage", "stage"), ("jobId", "job_id"),
+                                  ("status", "status"), ("message", "message")) if c in cols]
     # optional source-like column if table has it (e.g., source_key, sourceIdentifier)
-    source_col = None
-    for c in ETLJobLogs.columns:
-        n = c.name.lower()
-        if "source" in n or "identifier" in n or "key" in n:
-            source_col = c.name
-            break
+    source_col = next((c for c in cols if any(s in c.lower() for s in ("source", "identifier", "key"))), None)
     if source_col is not None:
-        payload[source_col] = key
+        fields.append((source_col, "key"))
+    return tuple(fields)
 
-    ins = {k: v for k, v in payload.items() if _col(ETLJobLogs, k) is not None}
-    if ins:
-        db.execute(insert(ETLJobLogs).values(ins))
 
+class ETLLogBuffer:
+    """Collects etlJobLogs entries and writes them in multi-row INSERTs on its own connection.
 
-# --- Public entrypoint ---
-def run_full_etl(prefix: str) -> Dict:
-    processed = 0
-    keys = sorted(list_csv_keys(prefix), key=lambda x: x["LastModified"])
-    with SessionLocal() as db:
-        # Create a top-level ETL job record so logs can reference its jobId (FK)
-        job_id = None
+    Entries are flushed once `batch_size` are pending, by a background thread once the
+    oldest is `interval` seconds old, and on flush()/close(). Log writes therefore never
+    commit (or stall) the load transaction. Identical row errors for a file collapse into
+    one entry ("row_error: X ×4,210"); past `max_row_errors` distinct messages per file
+    the rest are counted under a single "row_error: (other errors)" entry.
+    """
+
+    OTHER_ERRORS = "row_error: (other errors)"
+
+    def __init__(self, job_id: Optional[int] = None, bind=None, batch_size: Optional[int] = None,
+                 interval: Optional[float] = None, max_row_errors: Optional[int] = None):
+        self.job_id = job_id
+        self.bind = bind if bind is not None else engine
+        self.batch_size = batch_size or settings.ETL_LOG_BATCH_SIZE
+        self.max_row_errors = max_row_errors or settings.ETL_LOG_MAX_ROW_ERRORS
+        interval = settings.ETL_LOG_FLUSH_SECONDS if interval is None else interval
+        # (key, status, message) -> [row, count]; insertion order is log order
+        self._pending: Dict[Tuple[str, str, str], List] = {}
+        self._row_errors: Dict[str, int] = {}
+        self._since: Optional[float] = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self.written = self.dropped = 0
+        self._thread = None
+        # SQLite allows one writer: a timed flush would wait on the load transaction's lock
+        if interval > 0 and self.bind.dialect.name != "sqlite":
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="etl-log-writer", daemon=True)
+            self._thread.start()
+
+    def add(self, key: str, status: str, message: str = "") -> None:
+        from datetime import datetime
+
+        with self._lock:
+            ident = (key, status, message)
+            if status == "row-failed" and ident not in self._pending:
+                seen = self._row_errors.get(key, 0)
+                self._row_errors[key] = seen + 1
+                if seen >= self.max_row_errors:
+                    ident = (key, status, self.OTHER_ERRORS)
+            entry = self._pending.get(ident)
+            if entry is not None:
+                entry[1] += 1
+                return
+            vals = {"timestamp": datetime.utcnow(), "stage": "file", "job_id": self.job_id,
+                    "status": status, "message": ident[2], "key": key}
+            self._pending[ident] = [vals, 1]
+            if self._since is None:
+                self._since = time.monotonic()
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def _take(self) -> List[Dict]:
+        with self._lock:
+            pending, self._pending, self._since = self._pending, {}, None
+        plan = plan_for(ETLJobLogs).derived("log", _log_plan)
+        rows = []
+        for vals, n in pending.values():
+            if n > 1:
+                vals["message"] = f"{vals['message']} ×{n:,}"
+            rows.append({c: vals[f] for c, f in plan})
+        return rows
+
+    def flush(self) -> int:
+        """Write pending entries; returns how many rows were inserted."""
+        rows = self._take()
+        if not rows:
+            return 0
         try:
-            # Build a minimal job payload based on ETLJobs columns to satisfy NOT NULL constraints
-            job_vals: Dict = {}
-            for col in ETLJobs.columns:
-                # skip auto-increment PK if present
-                if col.primary_key:
-                    # If the PK is a string-like column (VARCHAR) and not autoincrementing,
-                    # generate a UUID to use as the jobId to satisfy NOT NULL PK constraint.
-                    if col.name == 'jobId' and getattr(col.type, 'length', None) is not None:
-                        # generate uuid string
-                        job_vals[col.name] = str(uuid.uuid4())
-                        continue
-                    continue
-                # if column is nullable or has a default we can skip explicit value
-                if col.nullable:
-                    continue
-                # Provide reasonable defaults for common column names
-                name = col.name.lower()
-                if "status" in name:
-                    job_vals[col.name] = "running"
-                elif "source" in name or "key" in name:
-                    job_vals[col.name] = prefix
-                elif "created" in name or "start" in name or "time" in name:
-                    from datetime import datetime
-                    # Set startTime for the job explicitly
-                    job_vals[col.name] = datetime.utcnow()
-                else:
-                    # Fallback on SQLAlchemy type hints: use 0 for ints, '' for text, utcnow for datetimes
-                    col_type = getattr(col.type, "__class__", None)
-                    tname = getattr(col.type, "__class__", type(col.type)).__name__.lower()
-                    if "int" in tname or "numeric" in tname or "integer" in tname:
-                        job_vals[col.name] = 0
-                    elif "date" in tname or "time" in tname:
-                        from datetime import datetime
-
-                        job_vals[col.name] = datetime.utcnow()
-                    else:
-                        job_vals[col.name] = ""
-
-            r_job = db.execute(insert(ETLJobs).values(job_vals))
-            # Persist immediately so FK constraints on logs can reference it
+            with self.bind.begin() as conn:
+                conn.execute(insert(ETLJobLogs), rows)
+        except Exception:
+            # diagnostics must never fail the load
+            self.dropped += len(rows)
+            return 0
+        self.written += len(rows)
+        return len(rows)
+
+    def _run(self, interval: float) -> None:
+        while not self._closed.wait(min(interval, 0.5)):
+            since = self._since
+            if since is not None and time.monotonic() - since >= interval:
+                self.flush()
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+
+# --- Pipelined fetch/parse ---
+_DONE = object()
+
+
+def _stream_rows(key: str) -> Iterator[Dict[str, str]]:
+    # defer the fetch until iteration so errors surface inside the per-file handler
+    yield from fetch_csv_rows(key)
+
+
+def _stream_columns(key: str, chunk_size: int) -> Iterator[Tuple[int, Dict[str, Sequence[Optional[str]]]]]:
+    yield from fetch_csv_columns(key, chunk_size)
+
+
+def _row_chunks(key: str, chunk_size: int, stats: Optional[FileMetrics] = None) -> Iterator[List[Dict[str, str]]]:
+    return _chunks(fetch_csv_rows(key, stats), chunk_size)
+
+
+def _read_metered(reader: Callable, key: str, chunk_size: int, stats: FileMetrics) -> Iterator:
+    """Chunks of reader(key, chunk_size, stats), adding the time spent producing them to stats."""
+    it = reader(key, chunk_size, stats)
+    while True:
+        t0 = time.perf_counter()
+        item = next(it, _DONE)
+        stats.source_seconds += time.perf_counter() - t0
+        if item is _DONE:
+            return
+        yield item
+
+
+def _produce(key: str, q: "queue.Queue", chunk_size: int, stop: threading.Event, reader: Callable = _row_chunks,
+             stats: Optional[FileMetrics] = None) -> None:
+    """Fetch and parse one object into chunks (rows, or columns) on a worker thread."""
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        chunks = reader(key, chunk_size) if stats is None else _read_metered(reader, key, chunk_size, stats)
+        for chunk in chunks:
+            if not put(chunk):
+                return
+        put(_DONE)
+    except BaseException as e:  # handed to the writer, which logs and raises it for this file
+        put(e)
+
+
+def _drain(q: "queue.Queue") -> Iterator[List[Dict[str, str]]]:
+    while True:
+        item = q.get()
+        if item is _DONE:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def prefetch_files(
+    objs: List[Dict], workers: int, chunk_size: int, depth: int, columnar: bool = False,
+    metrics: Optional[ETLMetrics] = None,
+) -> Iterator[Tuple[Dict, Iterable]]:
+    """Yield (object, rows) in input order while later objects download and parse ahead.
+
+    At most `workers` objects are in flight and each buffers at most `depth` chunks of
+    `chunk_size` parsed rows, so memory stays bounded regardless of file size. With
+    `columnar` each object yields fetch_csv_columns chunks instead of rows. With
+    `metrics` the fetch/parse time of each object is recorded on metrics.file(key).
+    """
+    reader = fetch_csv_columns if columnar else _row_chunks
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="etl-fetch")
+    pending: List[Tuple[Dict, "queue.Queue"]] = []
+    it = iter(objs)
+    try:
+        def submit() -> None:
+            o = next(it, None)
+            if o is not None:
+                q: "queue.Queue" = queue.Queue(maxsize=depth)
+                stats = metrics.file(o["Key"]) if metrics is not None else None
+                pool.submit(_produce, o["Key"], q, chunk_size, stop, reader, stats)
+                pending.append((o, q))
+
+        for _ in range(workers):
+            submit()
+        while pending:
+            o, q = pending.pop(0)
+            yield o, (_drain(q) if columnar else chain.from_iterable(_drain(q)))
+            submit()
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def open_sources(keys: List[Dict], workers: int, chunk_size: int, columnar: bool = False,
+                 metrics: Optional[ETLMetrics] = None) -> Iterator[Tuple[Dict, Iterable]]:
+    """(object, rows or column chunks) for each key, in order.
+
+    With more than one worker, later files download and parse on threads while the
+    caller writes, always handing files over in LastModified order.
+    """
+    if workers > 1:
+        return prefetch_files(keys, workers, chunk_size, settings.ETL_PREFETCH_CHUNKS, columnar, metrics)
+    if metrics is not None:
+        # read in chunks so the fetch/parse timers run per chunk rather than per row
+        if columnar:
+            return ((o, _read_metered(fetch_csv_columns, o["Key"], chunk_size, metrics.file(o["Key"]))) for o in keys)
+        return ((o, chain.from_iterable(_read_metered(_row_chunks, o["Key"], chunk_size, metrics.file(o["Key"]))))
+                for o in keys)
+    if columnar:
+        return ((o, _stream_columns(o["Key"], chunk_size)) for o in keys)
+    return ((o, _stream_rows(o["Key"])) for o in keys)
+
+
+# --- Ingestion manifest (incremental mode) ---
+
+def _naive_utc(ts):
+    """S3 returns tz-aware timestamps; DATETIME columns store naive UTC."""
+    if ts is not None and getattr(ts, "tzinfo", None) is not None:
+        from datetime import timezone
+
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def load_manifest(db: Session) -> Dict[str, Tuple[Optional[str], Optional[int]]]:
+    """Return {sourceKey: (eTag, objectSize)} for every object already ingested."""
+    if not ETLManifest.exists():
+        return {}
+    t = ETLManifest
+    return {r[0]: (r[1], r[2]) for r in db.execute(select(t.c.sourceKey, t.c.eTag, t.c.objectSize))}
+
+
+def changed_objects(objs: List[Dict], manifest: Dict[str, Tuple[Optional[str], Optional[int]]]) -> List[Dict]:
+    """Objects that are new or whose ETag/size differ from the manifest."""
+    return [o for o in objs if manifest.get(o["Key"]) != (o.get("ETag"), o.get("Size"))]
+
+
+def record_ingested(db: Session, o: Dict, job_id: Optional[int]) -> None:
+    """Upsert the manifest entry for an object (same transaction as its rows)."""
+    if not ETLManifest.exists():
+        return
+    from datetime import datetime
+
+    _bulk_upsert(db, ETLManifest, [{
+        "sourceKey": o["Key"],
+        "eTag": o.get("ETag"),
+        "objectSize": o.get("Size"),
+        "lastModified": _naive_utc(o.get("LastModified")),
+        "jobId": None if job_id is None else str(job_id),
+        "ingestedAt": datetime.utcnow(),
+    }], ["sourceKey"])
+
+
+# --- Bulk (set-based) upserts ---
+
+def _chunks(rows: Iterable, size: int) -> Iterator[List]:
+    """Yield lists of at most `size` items from an iterable."""
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _has_unique(t: Table, names: List[str]) -> bool:
+    """True if the reflected table has a PK/unique index covering exactly `names`."""
+    want = set(names)
+    if {c.name for c in t.primary_key.columns} == want:
+        return True
+    for ix in t.indexes:
+        if ix.unique and {c.name for c in ix.columns} == want:
+            return True
+    for con in t.constraints:
+        cols = getattr(con, "columns", None)
+        if con.__class__.__name__ == "UniqueConstraint" and {c.name for c in cols} == want:
+            return True
+    return False
+
+
+def _bulk_upsert(db: Session, t: Table, rows: List[Dict], keys: List[str], existing: Optional[set] = None,
+                 update_cols: Optional[Iterable[str]] = None) -> None:
+    """Write rows with one multi-row statement per table instead of one round trip per row.
+
+    Existing keys get `update_cols` overwritten (default: every column but the keys);
+    the other columns only fill newly inserted rows.
+
+    MySQL uses INSERT ... ON DUPLICATE KEY UPDATE when a unique index covers `keys`.
+    Other dialects (SQLite in tests) and tables without such an index fall back to a
+    single IN lookup for existing keys, an executemany UPDATE and a multi-row INSERT.
+    Callers that already know which keys exist (e.g. from a DimensionCache) can pass
+    them as `existing` to skip the lookup.
+    """
+    # last row wins for duplicate keys within the batch
+    by_key: Dict[Tuple, Dict] = {}
+    for r in rows:
+        by_key[tuple(r[k] for k in keys)] = r
+    rows = list(by_key.values())
+    if not rows:
+        return
+
+    cols = list(rows[0].keys())
+    upd_cols = [c for c in cols if c not in keys and (update_cols is None or c in update_cols)]
+
+    if db.bind.dialect.name == "mysql" and _has_unique(t, keys):
+        stmt = mysql_insert(t).values(rows)
+        if upd_cols:
+            stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in upd_cols})
+        else:
+            stmt = stmt.prefix_with("IGNORE")
+        db.execute(stmt)
+        return
+
+    if existing is None:
+        key_cols = [t.c[k] for k in keys]
+        existing = {
+            tuple(r)
+            for r in db.execute(
+                select(*key_cols).where(key_cols[0].in_({r[keys[0]] for r in rows}))
+            )
+        }
+    to_update = [r for r in rows if tuple(r[k] for k in keys) in existing]
+    to_insert = [r for r in rows if tuple(r[k] for k in keys) not in existing]
+
+    if to_update and upd_cols:
+        stmt = (
+            update(t)
+            .where(and_(*[t.c[k] == bindparam(f"k_{k}") for k in keys]))
+            .values({c: bindparam(f"v_{c}") for c in upd_cols})
+        )
+        db.execute(stmt, [
+            {**{f"k_{k}": r[k] for k in keys}, **{f"v_{c}": r[c] for c in upd_cols}}
+            for r in to_update
+        ])
+    if to_insert:
+        db.execute(insert(t).values(to_insert))
+
+
+def bulk_upsert_stores(db: Session, names: Iterable[str], cache: Optional[DimensionCache] = None) -> Dict[str, int]:
+    """Resolve display names to storeId (by normalized name), inserting missing stores."""
+    wanted: Dict[str, str] = {}
+    for n in names:
+        wanted.setdefault(_normalize_store_name(n), n)
+    if cache is not None:
+        found = {k: cache.get("stores", k) for k in wanted}
+        if all(v is not None for v in found.values()):
+            return found
+
+    key_col = _col(Stores, "storeKey")
+
+    def _load(lock: bool = False) -> Dict[str, int]:
+        if key_col is not None:
+            q = select(key_col, Stores.c.storeId).where(key_col.in_(wanted))
+            if lock:
+                q = q.with_for_update()
+            return {r[0]: r[1] for r in db.execute(q)}
+        # pre-storeKey schema: stores is a small dimension table, read it once and normalize in Python
+        rows = db.execute(select(Stores.c.storeId, Stores.c.storeName)).all()
+        out: Dict[str, int] = {}
+        for r in rows:
+            out.setdefault(_normalize_store_name(r.storeName), r.storeId)
+        return out
+
+    ids = _load()
+    missing = [k for k in wanted if k not in ids]
+    if missing:
+        if key_col is not None and db.bind.dialect.name == "mysql":
+            # unique storeKey makes concurrent inserts of the same store a no-op
+            stmt = mysql_insert(Stores).values([{"storeName": wanted[k], "storeKey": k} for k in missing])
+            db.execute(stmt.prefix_with("IGNORE"))
+            ids = _load(lock=True)
+        elif key_col is not None:
+            for k in missing:
+                ids[k] = upsert_store(db, wanted[k])
+        else:
+            db.execute(insert(Stores).values([{"storeName": wanted[k]} for k in missing]))
+            ids = _load()
+    if cache is not None:
+        for k in wanted:
+            cache.put("stores", k, ids[k])
+    return {k: ids[k] for k in wanted}
+
+
+def bulk_upsert_categories(db: Session, names: Iterable[Optional[str]], cache: Optional[DimensionCache] = None) -> Dict[str, int]:
+    """Resolve category names to categoryId, inserting missing categories."""
+    wanted = {n for n in names if n}
+    if not wanted:
+        return {}
+    if cache is not None:
+        found = {n: cache.get("categories", n) for n in wanted}
+        if all(v is not None for v in found.values()):
+            return found
+
+    id_col, name_col = _category_cols()
+
+    def _load() -> Dict[str, int]:
+        q = select(name_col, id_col).where(name_col.in_(wanted))
+        return {r[0]: r[1] for r in db.execute(q)}
+
+    ids = _load()
+    missing = [_existing_vals(ProductCats, {"categoryName": n}) for n in wanted if n not in ids]
+    if missing:
+        db.execute(insert(ProductCats).values(missing))
+        ids = _load()
+    if cache is not None:
+        for n, v in ids.items():
+            cache.put("categories", n, v)
+    return ids
+
+
+def bulk_upsert_products(db: Session, ds: List[Dict], cache: Optional[DimensionCache] = None) -> None:
+    """Insert a batch of products keyed by SKU, updating only the basePrice of existing ones (as upsert_product)."""
+    id_col, sku_col = _col(Products, "productId"), _col(Products, "sku")
+    if id_col is None or sku_col is None:
+        raise RuntimeError("products table missing productId/sku columns")
+
+    cat_ids = bulk_upsert_categories(db, (d.get("category") for d in ds), cache)
+    code_id = _code_is_product_id()
+    rows = [
+        _existing_vals(Products, {
+            **({"productId": d["sku"]} if code_id else {}),
+            "sku": d["sku"],
+            "productName": d["name"],
+            "description": d.get("description", ""),
+            "imageUrl": d.get("image_url", ""),
+            "brand": None,
+            "categoryId": cat_ids.get(d.get("category")),
+            "basePrice": d.get("basePrice"),
+        })
+        for d in ds
+    ]
+    if cache is None:
+        _bulk_upsert(db, Products, rows, ["sku"], update_cols=_PRODUCT_UPDATE_COLS)
+        return
+
+    # the cache was preloaded with every SKU, so a miss means the product is new
+    known = {r["sku"] for r in rows if cache.get("products", r["sku"]) is not None}
+    _bulk_upsert(db, Products, rows, ["sku"], existing={(k,) for k in known}, update_cols=_PRODUCT_UPDATE_COLS)
+    new = {r["sku"] for r in rows} - known
+    if new:
+        for r in db.execute(select(sku_col, id_col).where(sku_col.in_(new))):
+            cache.put("products", r[0], r[1])
+
+
+def bulk_upsert_offerings(db: Session, ds: List[Dict], store_ids: Dict[str, int], t: Optional[Table] = None) -> None:
+    """Upsert a batch of storeOfferings (or its staging copy `t`) by (productId, storeId)."""
+    t = StoreOfferings if t is None else t
+    if any(_col(t, c) is None for c in ("productId", "storeId", "price", "basePrice", "offerDetails")):
+        raise RuntimeError("storeOfferings must have productId, storeId, price, basePrice, offerDetails")
+
+    from datetime import datetime
+
+    now = datetime.utcnow()
+    ts_col = "lastUpdatedAt" if _col(t, "lastUpdatedAt") is not None else (
+        "updated_at" if _col(t, "updated_at") is not None else None)
+    rows = []
+    for d in ds:
+        vals = {
+            "productId": d["productId"],
+            "storeId": store_ids[_normalize_store_name(d["storeName"])],
+            "price": d["price"],
+            "basePrice": d.get("basePrice"),
+            "offerDetails": d.get("offerDetails"),
+        }
+        if ts_col:
+            vals[ts_col] = now
+        rows.append(vals)
+    _bulk_upsert(db, t, rows, ["productId", "storeId"])
+
+
+def _load_row(db: Session, d: Dict, cache: Optional[DimensionCache] = None, offerings: Optional[Table] = None) -> None:
+    """Per-row load of one mapped, discounted row (store, product, offering)."""
+    sid = upsert_store(db, d["storeName"], cache)
+    # upsert product (may create product record and persist basePrice)
+    upsert_product(db, {**d, "sku": d.get("productId"), "name": d.get("productId")}, cache)
+    upsert_offering(db, d, sid, offerings)
+
+
+def load_chunk(db: Session, ds: List[Dict], cache: Optional[DimensionCache] = None, offerings: Optional[Table] = None) -> None:
+    """Set-based load of mapped, discounted rows: one statement batch per table."""
+    if not ds:
+        return
+    store_ids = bulk_upsert_stores(db, (d["storeName"] for d in ds), cache)
+    bulk_upsert_products(db, [{**d, "sku": d.get("productId"), "name": d.get("productId")} for d in ds], cache)
+    bulk_upsert_offerings(db, ds, store_ids, offerings)
+
+
+# --- In-batch merge (last write wins) ---
+class OfferingMerge:
+    """Keeps only the latest mapped row per (productId, store) before anything is written.
+
+    Rows are added in file (LastModified) then row order. drain() yields the survivors
+    in the order of their last write, so the writer produces exactly the state a
+    row-by-row load would (including product basePrice, which follows the last row of
+    each product). Storage is compact: store names and offer labels are interned to
+    ints and prices live in typed arrays; a rewritten key moves to a new slot and the
+    dead slots are compacted away when they outnumber the live ones.
+    """
+
+    def __init__(self):
+        self._slot: Dict[Tuple[str, int], int] = {}
+        self._keys: List[Optional[Tuple[str, int]]] = []
+        self._price = array("d")
+        self._base = array("d")
+        self._rate = array("d")
+        self._label = array("I")
+        self._file = array("I")
+        self._stores: Dict[str, int] = {}
+        self._store_names: List[str] = []
+        self._labels: Dict[str, int] = {}
+        self._label_names: List[str] = []
+        self.rows = 0
+        self.written = 0
+
+    def __len__(self) -> int:
+        return len(self._slot)
+
+    @property
+    def eliminated(self) -> int:
+        """Writes saved so far: rows added minus rows handed to the writer (or still pending)."""
+        return self.rows - self.written - len(self._slot)
+
+    def _intern(self, table: Dict[str, int], names: List[str], key: str, name: str) -> int:
+        i = table.get(key)
+        if i is None:
+            i = table[key] = len(names)
+            names.append(name)
+        return i
+
+    def add(self, ds: Iterable[Dict], file_idx: int) -> None:
+        for d in ds:
+            sidx = self._intern(self._stores, self._store_names, _normalize_store_name(d["storeName"]), d["storeName"])
+            key = (d["productId"], sidx)
+            old = self._slot.get(key)
+            if old is not None:
+                self._keys[old] = None
+            self._slot[key] = len(self._keys)
+            self._keys.append(key)
+            self._price.append(d["price"])
+            self._base.append(d["basePrice"])
+            self._rate.append(d["rate"])
+            self._label.append(self._intern(self._labels, self._label_names, d["offerDetails"], d["offerDetails"]))
+            self._file.append(file_idx)
+            self.rows += 1
+        if len(self._keys) > 2 * len(self._slot) + 1024:
+            self._compact()
+
+    def _compact(self) -> None:
+        live = [i for i, k in enumerate(self._keys) if k is not None]
+        self._keys = [self._keys[i] for i in live]
+        for name in ("_price", "_base", "_rate", "_label", "_file"):
+            old = getattr(self, name)
+            setattr(self, name, array(old.typecode, (old[i] for i in live)))
+        self._slot = {k: i for i, k in enumerate(self._keys)}
+
+    def drain(self, chunk_size: int) -> Iterator[Tuple[int, List[Dict]]]:
+        """Yield (file index, mapped rows) chunks in last-write order and empty the buffer."""
+        chunk: List[Dict] = []
+        cur = None
+        for i, key in enumerate(self._keys):
+            if key is None:
+                continue
+            f = self._file[i]
+            if chunk and (f != cur or len(chunk) >= chunk_size):
+                yield cur, chunk
+                chunk = []
+            cur = f
+            chunk.append({
+                "productId": key[0],
+                "storeName": self._store_names[key[1]],
+                "basePrice": self._base[i],
+                "price": self._price[i],
+                "offerDetails": self._label_names[self._label[i]],
+                "rate": self._rate[i],
+            })
+        if chunk:
+            yield cur, chunk
+        self.written += len(self._slot)
+        # interned stores/labels stay: they are few and keep later slots comparable
+        self._slot, self._keys = {}, []
+        for name in ("_price", "_base", "_rate", "_label", "_file"):
+            setattr(self, name, array(getattr(self, name).typecode))
+
+    def stats(self) -> Dict[str, int]:
+        return {"rows": self.rows, "written": self.written, "eliminated": self.eliminated}
+
+
+# --- Shadow load of storeOfferings (and other fully reloaded tables) ---
+OFFERINGS_STAGING = "storeOfferings_staging"
+OFFERINGS_RETIRED = "storeOfferings_old"
+
+
+def create_shadow_table(db: Session, live: Table, name: str) -> Table:
+    """Create an empty copy `name` of the live table for a full reload to write into.
+
+    Readers keep using the live table until swap_shadow_table() replaces it.
+    """
+    db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    if db.bind.dialect.name == "mysql":
+        # LIKE copies columns, indexes and AUTO_INCREMENT but not foreign keys
+        db.execute(text(f"CREATE TABLE {name} LIKE `{live.name}`"))
+        for fk in live.foreign_key_constraints:
+            cols = ", ".join(f"`{c.name}`" for c in fk.columns)
+            refs = ", ".join(f"`{e.column.name}`" for e in fk.elements)
+            db.execute(text(
+                f"ALTER TABLE {name} ADD FOREIGN KEY ({cols}) "
+                f"REFERENCES `{fk.referred_table.name}` ({refs})"
+            ))
+        db.commit()
+        return Table(name, MetaData(), autoload_with=db.connection())
+    # elsewhere (SQLite) a column copy plus the unique indexes is enough: the swap copies rows
+    shadow = Table(name, MetaData(), *[c._copy() for c in live.columns])
+    for ix in live.indexes:
+        if ix.unique:
+            Index(f"{name}_{ix.name}", *[shadow.c[c.name] for c in ix.columns], unique=True)
+    shadow.create(db.connection())
+    db.commit()
+    return shadow
+
+
+def open_shadow_table(db: Session, name: str) -> Table:
+    """An existing shadow table (left by a checkpointed job, or created by a shard coordinator)."""
+    try:
+        return Table(name, MetaData(), autoload_with=db.connection())
+    except NoSuchTableError:
+        raise RuntimeError(f"{name} does not exist") from None
+
+
+def drop_shadow_table(db: Session, name: str) -> None:
+    """Discard a shadow table left by a failed run; the live table is untouched."""
+    try:
+        db.rollback()
+        db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        db.commit()
+    except Exception:
+        db.rollback()
+
+
+def swap_shadow_table(db: Session, live: Table, shadow: Table, retired: str) -> None:
+    """Atomically replace the live table with the fully loaded shadow table."""
+    db.commit()
+    if db.bind.dialect.name == "mysql":
+        # RENAME TABLE swaps both names in one atomic metadata operation
+        db.execute(text(
+            f"RENAME TABLE `{live.name}` TO {retired}, "
+            f"{shadow.name} TO `{live.name}`"
+        ))
+        db.execute(text(f"DROP TABLE {retired}"))
+        db.commit()
+        return
+    # SQLite: replace the contents in one transaction; readers see the old rows until COMMIT
+    cols = [c.name for c in shadow.columns]
+    db.execute(delete(live))
+    db.execute(insert(live).from_select(cols, select(*shadow.columns)))
+    db.execute(text(f"DROP TABLE {shadow.name}"))
+    db.commit()
+
+
+def publish_price_matrix(db: Session, job_id: Optional[int], logs: Optional["ETLLogBuffer"] = None) -> None:
+    """Rebuild the materialized product price matrix from the just-published tables.
+
+    A failed build empties the matrix so readers fall back to the catalog tables
+    instead of serving stale prices; it never fails the job.
+    """
+    from app.services.catalog_cache import PriceMatrix, materialize_price_matrix
+
+    if not PriceMatrix.exists():
+        return
+    try:
+        n = materialize_price_matrix(db, job_id)
+        if logs is not None:
+            logs.add(PriceMatrix.name, "success", f"priceMatrix rows={n}")
+    except Exception as e:
+        db.rollback()
+        try:
+            db.execute(delete(PriceMatrix))
             db.commit()
-            job_id = r_job.inserted_primary_key[0] if r_job.inserted_primary_key else None
         except Exception:
-            # If we cannot create a job record, proceed without job_id (logging will skip jobId)
             db.rollback()
-            job_id = None
-        try:
-            # Clear previous offerings so each ETL run replaces the storeOfferings with the latest discounted items only
+        if logs is not None:
+            logs.add(PriceMatrix.name, "failed", f"priceMatrix: {e}")
+
+
+def create_offerings_staging(db: Session) -> Table:
+    return create_shadow_table(db, StoreOfferings, OFFERINGS_STAGING)
+
+
+def open_offerings_staging(db: Session) -> Table:
+    return open_shadow_table(db, OFFERINGS_STAGING)
+
+
+def drop_offerings_staging(db: Session) -> None:
+    drop_shadow_table(db, OFFERINGS_STAGING)
+
+
+def swap_offerings(db: Session, staging: Table) -> None:
+    swap_shadow_table(db, StoreOfferings, staging, OFFERINGS_RETIRED)
+
+
+def _map_row_chunks(rows: Iterable[Dict[str, str]], size: int,
+                    stats: Optional[FileMetrics] = None) -> Iterator[Tuple[int, List[Dict], List[Exception]]]:
+    """Yield (rows read, mapped discounted rows, mapping errors) per chunk of dict rows."""
+    for chunk in _chunks(rows, size):
+        t0 = time.perf_counter()
+        ds: List[Dict] = []
+        errors: List[Exception] = []
+        for row in chunk:
             try:
-                if StoreOfferings is not None:
-                    db.execute(delete(StoreOfferings))
-                    db.commit()
-            except Exception:
-                db.rollback()
+                d = map_row(row)
+            except Exception as e:
+                errors.append(e)
+                continue
+            # Only consider rows with a positive discount rate
+            if d.get("rate", 0.0) > 0.0:
+                ds.append(d)
+        if stats is not None:
+            stats.seconds["map"] += time.perf_counter() - t0
+            stats.rows_skipped += len(chunk) - len(ds) - len(errors)
+        yield len(chunk), ds, errors
+
+
+def _map_column_chunks(chunks: Iterable[Tuple[int, Dict]],
+                       stats: Optional[FileMetrics] = None) -> Iterator[Tuple[int, List[Dict], List[Exception]]]:
+    """Same as _map_row_chunks for fetch_csv_columns output, mapped with map_columns."""
+    for n, cols in chunks:
+        t0 = time.perf_counter()
+        try:
+            ds = map_columns(n, cols, discounted_only=True)
+        except Exception:
+            # isolate the offending rows with the per-row mapper
+            names = list(cols)
+            rows = [dict(zip(names, vals)) for vals in zip(*(cols[k] for k in names))]
+            yield from _map_row_chunks(rows, max(n, 1), stats)
+            continue
+        if stats is not None:
+            stats.seconds["map"] += time.perf_counter() - t0
+            stats.rows_skipped += n - len(ds)
+        yield n, ds, []
+
+
+def _write_chunk(db: Session, key: str, ds: List[Dict], cache: DimensionCache,
+                 offerings: Optional[Table], logs: ETLLogBuffer) -> Tuple[int, int]:
+    """Bulk-write mapped rows in a savepoint; returns (loaded, failed)."""
+    mark = cache.mark()
+    try:
+        with db.begin_nested():
+            load_chunk(db, ds, cache, offerings)
+        return len(ds), 0
+    except Exception:
+        cache.rollback(mark)
+    # a bad row poisons the whole batch; retry row by row to isolate it
+    loaded = failed = 0
+    for d in ds:
+        mark = cache.mark()
+        try:
+            with db.begin_nested():
+                _load_row(db, d, cache, offerings)
+            loaded += 1
+        except Exception as e:
+            cache.rollback(mark)
+            failed += 1
+            _log_row_failure(logs, key, e)
+    return loaded, failed
+
+
+def _log_row_failure(logs: ETLLogBuffer, key: str, e: Exception) -> None:
+    """Log the row-level exception into ETL logs for diagnostics (buffered, aggregated)."""
+    logs.add(key, "row-failed", f"row_error: {str(e)}")
 
-            total_processed = 0
-            total_loaded = 0
-            total_failed = 0
-
-            for o in keys:
-                key = o["Key"]
-                file_count = 0
-                file_failed = 0
-                try:
-                        for row in fetch_csv_rows(key):
-                            total_processed += 1
-                            try:
-                                d = map_row(row)
-                                # Only consider rows with a positive discount rate
-                                if d.get("rate", 0.0) <= 0.0:
-                                    # skip non-discounted items, count as processed but not loaded
+
+# --- Job record ---
+def _job_plan(t: Table) -> Tuple[Tuple[str, str], ...]:
+    """(column, kind) for the ETLJobs columns a new job row must fill.
+
+    kind is one of uuid|running|prefix|now|zero|empty; run_full_etl turns it into a value.
+    """
+    plan: List[Tuple[str, str]] = []
+    for col in t.columns:
+        # skip auto-increment PK if present
+        if col.primary_key:
+            # A string-like (VARCHAR) jobId PK is not autoincrementing: generate a UUID
+            if col.name == "jobId" and getattr(col.type, "length", None) is not None:
+                plan.append((col.name, "uuid"))
+            continue
+        # if column is nullable or has a default we can skip explicit value
+        if col.nullable:
+            continue
+        # Provide reasonable defaults for common column names
+        name = col.name.lower()
+        if "status" in name:
+            kind = "running"
+        elif "source" in name or "key" in name:
+            kind = "prefix"
+        elif "created" in name or "start" in name or "time" in name:
+            kind = "now"
+        else:
+            # Fallback on SQLAlchemy type hints: 0 for ints, utcnow for datetimes, '' for text
+            tname = type(col.type).__name__.lower()
+            if "int" in tname or "numeric" in tname or "integer" in tname:
+                kind = "zero"
+            elif "date" in tname or "time" in tname:
+                kind = "now"
+            else:
+                kind = "empty"
+        plan.append((col.name, kind))
+    return tuple(plan)
+
+
+def create_job(db: Session, prefix: str) -> Optional[int]:
+    """Insert the top-level etlJobs record so logs can reference its jobId (FK).
+
+    Returns None if the record cannot be created; the ETL then runs without one.
+    """
+    try:
+        # Minimal job payload that satisfies the NOT NULL columns (plan computed once per table)
+        from datetime import datetime
+
+        fill = {"running": "running", "prefix": prefix, "now": datetime.utcnow(), "zero": 0, "empty": ""}
+        job_vals = {c: str(uuid.uuid4()) if kind == "uuid" else fill[kind]
+                    for c, kind in plan_for(ETLJobs).derived("job", _job_plan)}
+
+        r_job = db.execute(insert(ETLJobs).values(job_vals))
+        # Persist immediately so FK constraints on logs can reference it
+        db.commit()
+        return r_job.inserted_primary_key[0] if r_job.inserted_primary_key else None
+    except Exception:
+        # If we cannot create a job record, proceed without job_id (logging will skip jobId)
+        db.rollback()
+        return None
+
+
+def _metrics_value(metrics: Optional[Dict]):
+    """etlJobs.metrics value: the dict for a JSON column, serialized for a text column."""
+    col = _col(ETLJobs, "metrics")
+    if metrics is None or col is None or isinstance(col.type, JSON):
+        return metrics
+    return json.dumps(metrics)
+
+
+def track_statements(metrics: ETLMetrics, conn: Connection) -> None:
+    """Count the statements of the ETL's connection `conn` on `metrics`, if the counts
+    are kept anywhere: the etlJobs.metrics column or a metrics hook."""
+    if metrics.hooked or _col(ETLJobs, "metrics") is not None:
+        metrics.track(conn)
+
+
+def finish_job(db: Session, job_id: Optional[int], processed: int, loaded: int, failed: int,
+               metrics: Optional[Dict] = None) -> None:
+    """Update the job row with overallStatus, totals and stage metrics if columns exist."""
+    if job_id is None:
+        return
+    from datetime import datetime
+    # Overall status depends on whether we loaded any rows
+    vals = {
+        "overallStatus": "success" if loaded > 0 else "failed",
+        "totalItemProcessed": processed,
+        "totalItemLoaded": loaded,
+        "totalItemFailed": failed,
+        "endTime": datetime.utcnow(),
+    }
+    if metrics is not None:
+        vals["metrics"] = _metrics_value(metrics)
+    upd = _existing_vals(ETLJobs, vals)
+    if upd:
+        db.execute(update(ETLJobs).where(ETLJobs.c.jobId == job_id).values(upd))
+        db.commit()
+
+
+def fail_job(db: Session, job_id: Optional[int], metrics: Optional[Dict] = None) -> None:
+    """Mark the job failed (best effort; the caller re-raises the original error)."""
+    try:
+        if job_id is not None and _col(ETLJobs, "overallStatus") is not None:
+            vals = {"overallStatus": "failed"}
+            if metrics is not None:
+                vals["metrics"] = _metrics_value(metrics)
+            db.execute(update(ETLJobs).where(ETLJobs.c.jobId == job_id).values(_existing_vals(ETLJobs, vals)))
+            db.commit()
+    except Exception:
+        db.rollback()
+
+
+def save_checkpoint(db: Session, job_id: Optional[int], key: str, row: int, totals: Tuple[int, int, int]) -> None:
+    """Commit the load so far together with the position it reached.
+
+    The checkpoint is written in the same transaction as the rows, so a resumed job
+    starts exactly after the last committed row of `key`.
+    """
+    if job_id is not None and _col(ETLJobs, "checkpointKey") is not None:
+        from datetime import datetime
+
+        processed, loaded, failed = totals
+        db.execute(update(ETLJobs).where(ETLJobs.c.jobId == job_id).values(_existing_vals(ETLJobs, {
+            "checkpointKey": key,
+            "checkpointRow": row,
+            "checkpointAt": datetime.utcnow(),
+            "totalItemProcessed": processed,
+            "totalItemLoaded": loaded,
+            "totalItemFailed": failed,
+        })))
+    db.commit()
+
+
+def load_checkpoint(db: Session, job_id: int) -> Dict:
+    """Last checkpoint of a job: {"key", "row", "status", "totals": (processed, loaded, failed)}."""
+    if _col(ETLJobs, "checkpointKey") is None:
+        raise RuntimeError("resuming an ETL job requires the etlJobs checkpoint columns")
+    job = db.execute(select(ETLJobs).where(ETLJobs.c.jobId == job_id)).mappings().first()
+    if job is None:
+        raise ValueError(f"unknown ETL job {job_id}")
+    return {
+        "key": job["checkpointKey"],
+        "row": job["checkpointRow"] or 0,
+        "status": job.get("overallStatus"),
+        "totals": tuple(job.get(c) or 0 for c in ("totalItemProcessed", "totalItemLoaded", "totalItemFailed")),
+    }
+
+
+def _skip_rows(rows: Iterable, n: int, columnar: bool) -> Iterator:
+    """Drop the first n rows of a row stream, or of a (count, columns) chunk stream."""
+    if not columnar:
+        yield from islice(rows, n, None)
+        return
+    for count, cols in rows:
+        if n >= count:
+            n -= count
+            continue
+        if n:
+            count, cols, n = count - n, {k: v[n:] for k, v in cols.items()}, 0
+        yield count, cols
+
+
+# --- Public entrypoint ---
+def run_full_etl(
+    prefix: str,
+    bulk: bool = False,
+    chunk_size: Optional[int] = None,
+    incremental: bool = False,
+    workers: Optional[int] = None,
+    columnar: bool = False,
+    checkpoint_every: Optional[int] = None,
+    resume_job_id: Optional[int] = None,
+    shards: Optional[int] = None,
+    merge: bool = False,
+) -> Dict:
+    """Load every CSV under `prefix` into storeOfferings.
+
+    With `bulk=True` rows are read in chunks of `chunk_size` (default
+    settings.ETL_BATCH_SIZE) and written with multi-row statements per table.
+    With `incremental=True` only objects that are new or changed since the
+    ingestion manifest was last written are fetched, and existing offerings are
+    kept instead of being replaced; an unchanged prefix returns without
+    creating a job.
+    `workers` (default settings.ETL_FETCH_WORKERS) threads fetch and parse
+    upcoming files while a single writer applies them to the DB.
+    `columnar=True` (implies bulk) parses chunks as columns and maps them with
+    map_columns instead of map_row per row (a 1.7-2.7x faster map stage; parsing
+    and writing are unchanged).
+    `checkpoint_every` (default settings.ETL_CHECKPOINT_ROWS, 0 = off) commits
+    after that many rows and records the file key and row offset on the job;
+    `resume_job_id` continues such a job from its last checkpoint, reusing its
+    staging table, instead of reprocessing the whole prefix.
+    `shards` (default settings.ETL_SHARDS) > 1 runs the bulk load across that
+    many worker processes; see etl_shard.run_sharded_etl.
+    `merge=True` (implies bulk) keeps only the latest row per (productId, store)
+    across all files in an OfferingMerge and writes each offering once at the end
+    (or whenever ETL_MERGE_MAX_KEYS keys are buffered); the summary reports the
+    writes it eliminated.
+    Stage timers and counters (see etl_metrics) are stored on etlJobs.metrics,
+    logged per file as "metrics" entries and passed to any registered metrics hook.
+    Returns a job summary including the dimension cache hit/miss counters.
+    """
+    n_shards = shards or settings.ETL_SHARDS
+    if merge and (checkpoint_every or resume_job_id is not None):
+        raise ValueError("merged ETL runs cannot be checkpointed: rows are written at the end")
+    if n_shards > 1:
+        if checkpoint_every or resume_job_id is not None:
+            raise ValueError("checkpointed ETL runs cannot be sharded")
+        if merge:
+            raise ValueError("merged ETL runs cannot be sharded")
+        from app.services.etl_shard import run_sharded_etl
+
+        return run_sharded_etl(prefix, n_shards, chunk_size=chunk_size, incremental=incremental,
+                               workers=workers, columnar=columnar)
+    size = chunk_size or settings.ETL_BATCH_SIZE
+    bulk = bulk or columnar or merge
+    n_workers = workers or settings.ETL_FETCH_WORKERS
+    every = 0 if merge else (settings.ETL_CHECKPOINT_ROWS if checkpoint_every is None else checkpoint_every)
+    checkpointing = bool(every) or resume_job_id is not None
+    total_processed = 0
+    total_loaded = 0
+    total_failed = 0
+    metrics = ETLMetrics()
+    t0 = time.perf_counter()
+    keys = sorted(list_csv_keys(prefix), key=lambda x: (x["LastModified"], x["Key"]))
+    metrics.job.seconds["list"] += time.perf_counter() - t0
+    # one connection for the whole run, so its statements can be counted on it alone
+    with engine.connect() as conn, SessionLocal(bind=conn) as db:
+        listed = len(keys)
+        # every object of the job, including those a resumed job loaded before its checkpoint
+        job_keys = keys
+        # row offset to start from, per object key (only the checkpointed file on resume)
+        resume_at: Dict[str, int] = {}
+        if resume_job_id is not None:
+            ckpt = load_checkpoint(db, resume_job_id)
+            if ckpt["status"] == "success":
+                raise ValueError(f"ETL job {resume_job_id} already completed")
+            total_processed, total_loaded, total_failed = ckpt["totals"]
+            if ckpt["key"] is not None:
+                at = next((i for i, o in enumerate(keys) if o["Key"] == ckpt["key"]), None)
+                if at is None:
+                    raise RuntimeError(f"checkpoint object {ckpt['key']} is no longer listed under {prefix!r}")
+                keys = keys[at:]
+                resume_at[ckpt["key"]] = ckpt["row"]
+        if incremental:
+            if not ETLManifest.exists():
+                raise RuntimeError("incremental ETL requires the etlIngestManifest table")
+            keys = changed_objects(keys, load_manifest(db))
+            if not keys:
+                return {"jobId": None, "processed": 0, "loaded": 0, "failed": 0, "skipped": listed}
+
+        if resume_job_id is not None:
+            job_id = resume_job_id
+            db.execute(update(ETLJobs).where(ETLJobs.c.jobId == job_id)
+                       .values(_existing_vals(ETLJobs, {"overallStatus": "running", "endTime": None})))
+            db.commit()
+        else:
+            job_id = create_job(db, prefix)
+        metrics.job_id = job_id
+        track_statements(metrics, conn)
+        staging = None
+        # etlJobLogs entries are buffered and written on their own connection
+        logs = ETLLogBuffer(job_id)
+        try:
+            # A full run replaces storeOfferings with the latest discounted items only. Load
+            # into a staging copy and swap it in at the end so readers never see a partial table.
+            # A resumed job keeps loading into the staging table it had already filled.
+            if incremental:
+                staging = None
+            elif resume_job_id is not None:
+                staging = open_offerings_staging(db)
+            else:
+                staging = create_offerings_staging(db)
+            # staged rows are not live until the swap: their manifest entries wait for it, or
+            # a failed run would leave objects marked ingested that incremental runs then skip
+            defer_manifest = staging is not None
+
+            # Preload store/category/product ids once instead of querying them per row
+            cache = DimensionCache.preload(db)
+            merger = OfferingMerge() if merge else None
+
+            def write_merged() -> None:
+                nonlocal total_loaded, total_failed
+                for idx, ds in merger.drain(size):
+                    fm = metrics.begin_file(keys[idx]["Key"])
+                    t0 = time.perf_counter()
+                    loaded, failed = _write_chunk(db, keys[idx]["Key"], ds, cache, staging, logs)
+                    fm.seconds["write"] += time.perf_counter() - t0
+                    fm.rows_loaded += loaded
+                    fm.rows_failed += failed
+                    total_loaded += loaded
+                    total_failed += failed
+                metrics.current = metrics.job
+
+            files = open_sources(keys, n_workers, size, columnar, metrics)
+            with closing(files):
+                for idx, (o, rows) in enumerate(files):
+                    key = o["Key"]
+                    fm = metrics.begin_file(key)
+                    file_count = 0
+                    file_failed = 0
+                    # rows of this file read so far, and as of the last checkpoint
+                    file_rows = saved = resume_at.get(key, 0)
+                    if file_rows:
+                        rows = _skip_rows(rows, file_rows, columnar)
+                    try:
+                        if bulk:
+                            mapped = _map_column_chunks(rows, fm) if columnar else _map_row_chunks(rows, size, fm)
+                            for n, ds, errors in mapped:
+                                total_processed += n
+                                fm.rows_parsed += n
+                                fm.rows_failed += len(errors)
+                                for e in errors:
+                                    file_failed += 1
+                                    total_failed += 1
+                                    _log_row_failure(logs, key, e)
+                                if merger is not None:
+                                    # written later, once per key; count rows accepted for this file
+                                    merger.add(ds, idx)
+                                    file_count += len(ds)
+                                    if len(merger) >= settings.ETL_MERGE_MAX_KEYS:
+                                        write_merged()
+                                        metrics.current = fm
                                     continue
-                                sid = upsert_store(db, d["storeName"])
-                                # upsert product (may create product record and persist basePrice)
-                                upsert_product(db, {**d, "sku": d.get("productId"), "name": d.get("productId")})
-                                upsert_offering(db, d, sid)
-                                file_count += 1
-                                total_loaded += 1
-                            except Exception as e:
-                                # per-row failure should not stop the file; record and continue
-                                file_failed += 1
-                                total_failed += 1
-                                # Log the row-level exception into ETL logs for diagnostics
+                                t0 = time.perf_counter()
+                                loaded, failed = _write_chunk(db, key, ds, cache, staging, logs)
+                                fm.seconds["write"] += time.perf_counter() - t0
+                                fm.rows_loaded += loaded
+                                fm.rows_failed += failed
+                                file_count += loaded
+                                total_loaded += loaded
+                                file_failed += failed
+                                total_failed += failed
+                                file_rows += n
+                                if every and file_rows - saved >= every:
+                                    save_checkpoint(db, job_id, key, file_rows, (total_processed, total_loaded, total_failed))
+                                    saved = file_rows
+                        else:
+                            for row in rows:
+                                if every and file_rows - saved >= every:
+                                    save_checkpoint(db, job_id, key, file_rows, (total_processed, total_loaded, total_failed))
+                                    saved = file_rows
+                                total_processed += 1
+                                file_rows += 1
+                                t0 = time.perf_counter()
                                 try:
-                                    log(db, key, "row-failed", f"row_error: {str(e)}", job_id=job_id)
-                                    db.commit()
-                                except Exception:
-                                    db.rollback()
+                                    d = map_row(row)
+                                    t1 = time.perf_counter()
+                                    fm.seconds["map"] += t1 - t0
+                                    # Only consider rows with a positive discount rate
+                                    if d.get("rate", 0.0) <= 0.0:
+                                        # skip non-discounted items, count as processed but not loaded
+                                        fm.rows_skipped += 1
+                                        continue
+                                    _load_row(db, d, cache, staging)
+                                    fm.seconds["write"] += time.perf_counter() - t1
+                                    file_count += 1
+                                    total_loaded += 1
+                                except Exception as e:
+                                    # per-row failure should not stop the file; record and continue
+                                    file_failed += 1
+                                    total_failed += 1
+                                    _log_row_failure(logs, key, e)
+                            fm.rows_parsed = file_rows - resume_at.get(key, 0)
+                            fm.rows_loaded = file_count
+                            fm.rows_failed = file_failed
                         # aggregate processed count (including skipped non-discounted rows)
                         log_msg = f"processed={total_processed}, loaded={file_count}, failed={file_failed}"
-                        log(db, key, "success" if file_failed == 0 else "partial", log_msg, job_id=job_id)
-                        db.commit()
-                except Exception as e:
-                    db.rollback()
-                    log(db, key, "failed", str(e), job_id=job_id)
-                    # propagate so outer try can mark job failure
-                    raise
-
-            # If we reach here, update the job row with overallStatus and totals if columns exist
-            if job_id is not None:
-                upd: Dict = {}
-                from datetime import datetime
-                # Overall status depends on whether we loaded any rows
-                if _col(ETLJobs, "overallStatus") is not None:
-                    upd["overallStatus"] = "success" if total_loaded > 0 else "failed"
-                if _col(ETLJobs, "totalItemProcessed") is not None:
-                    upd["totalItemProcessed"] = total_processed
-                if _col(ETLJobs, "totalItemLoaded") is not None:
-                    upd["totalItemLoaded"] = total_loaded
-                if _col(ETLJobs, "totalItemFailed") is not None:
-                    upd["totalItemFailed"] = total_failed
-                if _col(ETLJobs, "endTime") is not None:
-                    upd["endTime"] = datetime.utcnow()
-                if upd:
-                    db.execute(update(ETLJobs).where(ETLJobs.c.jobId == job_id).values(upd))
+                        t0 = time.perf_counter()
+                        # merged rows are not durable yet: the manifest entry waits for write_merged()
+                        if merger is None and not defer_manifest:
+                            record_ingested(db, o, job_id)
+                        if checkpointing:
+                            save_checkpoint(db, job_id, key, file_rows, (total_processed, total_loaded, total_failed))
+                        else:
+                            db.commit()
+                        fm.seconds["write"] += time.perf_counter() - t0
+                        logs.add(key, "success" if file_failed == 0 else "partial", log_msg)
+                        record = metrics.end_file(key)
+                        logs.add(key, "metrics", json.dumps(record))
+                        logs.flush()
+                    except Exception as e:
+                        db.rollback()
+                        logs.add(key, "failed", str(e))
+                        # propagate so outer try can mark job failure
+                        raise
+
+            if merger is not None:
+                write_merged()
+                if not defer_manifest:
+                    for o in keys:
+                        record_ingested(db, o, job_id)
+                db.commit()
+                st = merger.stats()
+                logs.add(prefix, "merged", f"rows={st['rows']}, written={st['written']}, eliminated={st['eliminated']}")
+
+            # Publish the new offerings only from a run that loaded something (a "failed" job)
+            t0 = time.perf_counter()
+            if staging is not None:
+                if total_loaded > 0:
+                    swap_offerings(db, staging)
+                    for o in job_keys:
+                        record_ingested(db, o, job_id)
                     db.commit()
+                else:
+                    drop_offerings_staging(db)
+            if total_loaded > 0:
+                publish_price_matrix(db, job_id, logs)
+            metrics.job.seconds["publish"] += time.perf_counter() - t0
+
+            summary = metrics.summary()
+            finish_job(db, job_id, total_processed, total_loaded, total_failed, summary)
+            metrics.emit("job", {**summary, "status": "success" if total_loaded > 0 else "failed"})
         except Exception:
-            # mark job failed
-            try:
-                if job_id is not None and _col(ETLJobs, "overallStatus") is not None:
-                    db.execute(update(ETLJobs).where(ETLJobs.c.jobId == job_id).values({"overallStatus": "failed"}))
-                    db.commit()
-            except Exception:
+            summary = metrics.summary()
+            fail_job(db, job_id, summary)
+            metrics.emit("job", {**summary, "status": "failed"})
+            # leave the live storeOfferings untouched; a checkpointed job keeps its
+            # staging table so resume_job_id can continue it
+            if checkpointing:
                 db.rollback()
+            else:
+                drop_offerings_staging(db)
             raise
+        finally:
+            metrics.untrack()
+            logs.close()
+
+        return {
+            "jobId": job_id,
+            "processed": total_processed,
+            "loaded": total_loaded,
+            "failed": total_failed,
+            "skipped": listed - len(keys),
+            "cache": cache.stats(),
+            "metrics": summary,
+            **({"merge": merger.stats()} if merger is not None else {}),
+        }
 
-        return {"processed": processed}
+
+# --- Watch-folder mode (local storage) ---
+def watch_and_ingest(prefix: str = "", on_result: Optional[Callable[[Dict], None]] = None, **etl_kwargs) -> None:
+    """Block and ingest source files under the local watch folder as soon as they land.
+
+    Each burst of file events triggers an incremental run, so only the new or changed
+    files are loaded. Requires STORAGE_BACKEND=local and the optional `watchdog` package.
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError as e:
+        raise RuntimeError("watch mode requires the 'watchdog' package") from e
+
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise RuntimeError("watch mode requires STORAGE_BACKEND=local")
+
+    wake = threading.Event()
+
+    class _Handler(FileSystemEventHandler):
+        def _maybe_wake(self, path: str) -> None:
+            try:
+                key = storage.key(path)
+            except ValueError:
+                return
+            if key.startswith(prefix) and is_source_key(key):
+                wake.set()
+
+        # closed = a writer finished the file; moved = atomic rename into the folder
+        def on_closed(self, event):
+            if not event.is_directory:
+                self._maybe_wake(event.src_path)
+
+        def on_moved(self, event):
+            if not event.is_directory:
+                self._maybe_wake(event.dest_path)
+
+    observer = Observer()
+    observer.schedule(_Handler(), storage.root, recursive=True)
+    observer.start()
+    try:
+        wake.set()  # pick up anything that landed while we were down
+        while True:
+            wake.wait()
+            wake.clear()
+            result = run_full_etl(prefix, incremental=True, **etl_kwargs)
+            if on_result is not None:
+                on_result(result)
+    finally:
+        observer.stop()
+        observer.join()
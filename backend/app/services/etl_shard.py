@@ -0,0 +1,262 @@
+# backend/app/services/etl_shard.py
+# Sharded ETL: worker processes parse/map whole files, then write products/offerings by productId shard
+
+import multiprocessing as mp
+import json, os, pickle, shutil, tempfile, time, zlib
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.services import etl_service as etl
+from app.services.etl_metrics import ETLMetrics, FileMetrics
+
+# mapped row fields kept in the spill files, in this order
+_SPILL_FIELDS = ("productId", "storeName", "basePrice", "price", "offerDetails", "rate")
+
+
+def shard_of(product_id, shards: int) -> int:
+    """Stable shard for a productId (crc32, so every process agrees, unlike hash())."""
+    return zlib.crc32(str(product_id).encode("utf-8")) % shards
+
+
+def _spill_path(spill_dir: str, idx: int, shard: int) -> str:
+    return os.path.join(spill_dir, f"{idx:06d}.{shard}.pkl")
+
+
+def _read_spill(path: str) -> Iterator[List[Dict]]:
+    """Mapped row chunks of one (file, shard) spill, in the order they were written."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        while True:
+            try:
+                rows = pickle.load(f)
+            except EOFError:
+                return
+            yield [dict(zip(_SPILL_FIELDS, r)) for r in rows]
+
+
+def _map_file(idx: int, key: str, shards: int, spill_dir: str, chunk_size: int, columnar: bool,
+              job_id: Optional[int]) -> Tuple[int, int, Set[str], FileMetrics]:
+    """Phase 1, in a worker: fetch, parse and map one object, spilling its discounted rows per shard.
+
+    Returns (rows processed, rows that failed to map, store names seen, the file's metrics).
+    Any error reading the object propagates and fails the job.
+    """
+    fm = FileMetrics(key)
+    processed = failed = 0
+    stores: Set[str] = set()
+    outs: Dict[int, object] = {}
+    logs = etl.ETLLogBuffer(job_id)
+    try:
+        if columnar:
+            mapped = etl._map_column_chunks(etl._read_metered(etl.fetch_csv_columns, key, chunk_size, fm), fm)
+        else:
+            rows = chain.from_iterable(etl._read_metered(etl._row_chunks, key, chunk_size, fm))
+            mapped = etl._map_row_chunks(rows, chunk_size, fm)
+        for n, ds, errors in mapped:
+            processed += n
+            fm.rows_parsed += n
+            fm.rows_failed += len(errors)
+            for e in errors:
+                failed += 1
+                etl._log_row_failure(logs, key, e)
+            parts: Dict[int, List[Tuple]] = {}
+            for d in ds:
+                stores.add(d["storeName"])
+                parts.setdefault(shard_of(d["productId"], shards), []).append(tuple(d[k] for k in _SPILL_FIELDS))
+            for shard, part in parts.items():
+                f = outs.get(shard)
+                if f is None:
+                    f = outs[shard] = open(_spill_path(spill_dir, idx, shard), "wb")
+                pickle.dump(part, f, protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        for f in outs.values():
+            f.close()
+        logs.close()
+    return processed, failed, stores, fm
+
+
+def _write_shard(shard: int, keys: List[str], spill_dir: str, store_ids: Dict[str, int], job_id: Optional[int],
+                 use_staging: bool) -> Dict[str, Tuple[int, int, FileMetrics]]:
+    """Phase 2, in a worker: write this shard's rows of every file, in file order, on its own engine.
+
+    Every (productId, storeId) belongs to exactly one shard, so the last file wins as in a
+    single-process run. Each chunk commits on its own (short transactions keep shards from
+    holding locks on each other). Returns {key: (loaded, failed, write metrics)}.
+    """
+    out: Dict[str, Tuple[int, int, FileMetrics]] = {}
+    metrics = ETLMetrics(job_id)
+    with engine.connect() as conn, SessionLocal(bind=conn) as db:
+        offerings = etl.open_offerings_staging(db) if use_staging else None
+        cache = etl.DimensionCache.preload(db)
+        # the coordinator already resolved (and committed) every store of the job
+        for k, v in store_ids.items():
+            cache.put("stores", k, v)
+        logs = etl.ETLLogBuffer(job_id)
+        etl.track_statements(metrics, conn)
+        try:
+            for idx, key in enumerate(keys):
+                fm = metrics.begin_file(key)
+                loaded = failed = 0
+                for ds in _read_spill(_spill_path(spill_dir, idx, shard)):
+                    t0 = time.perf_counter()
+                    n_loaded, n_failed = etl._write_chunk(db, key, ds, cache, offerings, logs)
+                    db.commit()
+                    fm.seconds["write"] += time.perf_counter() - t0
+                    loaded += n_loaded
+                    failed += n_failed
+                fm.rows_loaded += loaded
+                fm.rows_failed += failed
+                out[key] = (loaded, failed, fm)
+        finally:
+            metrics.untrack()
+            logs.close()
+    return out
+
+
+def _run_all(pool: ProcessPoolExecutor, calls: List[Tuple], labels: List[str], logs: "etl.ETLLogBuffer") -> List:
+    """Results of pool.submit(*call) for every call, in order.
+
+    The first failure is logged under its label and raised once the calls already
+    running have finished; queued calls are cancelled.
+    """
+    futures = [pool.submit(*call) for call in calls]
+    done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+    for label, f in zip(labels, futures):
+        if f in done and f.exception() is not None:
+            for g in futures:
+                g.cancel()
+            wait(futures)
+            logs.add(label, "failed", str(f.exception()))
+            raise f.exception()
+    return [f.result() for f in futures]
+
+
+def run_sharded_etl(
+    prefix: str,
+    shards: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    incremental: bool = False,
+    workers: Optional[int] = None,
+    columnar: bool = False,
+) -> Dict:
+    """Bulk ETL with fetching, parsing, mapping and writing spread over `shards` processes.
+
+    Phase 1 hands each object to a worker, which fetches, parses and maps it and spills
+    the discounted rows to one local file per productId shard (shard_of). Phase 2 gives
+    each worker one shard: it writes that shard's rows of every object in LastModified
+    order, so each (productId, storeId) is written by one process and the last file wins,
+    exactly as in a single-process run. Between the phases the coordinator (this process)
+    upserts the stores seen in phase 1, the only dimension shared across shards.
+
+    The coordinator only assigns work, merges per-file counts and metrics into the one
+    etlJobs record, and creates and swaps the staging table. Phase 1 runs one object per
+    process, so parsing scales with the number of objects (split large uploads). The
+    fetch `workers` of a single-process run are not used.
+    """
+    n_shards = shards or settings.ETL_SHARDS
+    size = chunk_size or settings.ETL_BATCH_SIZE
+    total_processed = 0
+    total_loaded = 0
+    total_failed = 0
+    metrics = ETLMetrics()
+    t0 = time.perf_counter()
+    keys = sorted(etl.list_csv_keys(prefix), key=lambda x: (x["LastModified"], x["Key"]))
+    metrics.job.seconds["list"] += time.perf_counter() - t0
+    with engine.connect() as conn, SessionLocal(bind=conn) as db:
+        listed = len(keys)
+        if incremental:
+            if not etl.ETLManifest.exists():
+                raise RuntimeError("incremental ETL requires the etlIngestManifest table")
+            keys = etl.changed_objects(keys, etl.load_manifest(db))
+            if not keys:
+                return {"jobId": None, "processed": 0, "loaded": 0, "failed": 0, "skipped": listed}
+
+        job_id = etl.create_job(db, prefix)
+        metrics.job_id = job_id
+        etl.track_statements(metrics, conn)
+        logs = etl.ETLLogBuffer(job_id)
+        cache = etl.DimensionCache()
+        staging = None
+        spill_dir = tempfile.mkdtemp(prefix="etl-shard-")
+        # spawned, so every worker builds its own engine
+        pool = ProcessPoolExecutor(max_workers=n_shards, mp_context=mp.get_context("spawn"))
+        try:
+            staging = None if incremental else etl.create_offerings_staging(db)
+            names = [o["Key"] for o in keys]
+
+            mapped = _run_all(pool, [(_map_file, i, key, n_shards, spill_dir, size, columnar, job_id)
+                                     for i, key in enumerate(names)], names, logs)
+            stores: Set[str] = set()
+            for key, (processed, failed, seen, fm) in zip(names, mapped):
+                total_processed += processed
+                total_failed += failed
+                stores |= seen
+                metrics.file(key).add(fm)
+
+            t0 = time.perf_counter()
+            cache = etl.DimensionCache.preload(db)
+            store_ids = etl.bulk_upsert_stores(db, stores, cache)
+            # workers reference these storeIds from their own connections
+            db.commit()
+            metrics.job.seconds["write"] += time.perf_counter() - t0
+
+            written = _run_all(pool, [(_write_shard, i, names, spill_dir, store_ids, job_id, staging is not None)
+                                      for i in range(n_shards)], [f"{prefix} shard {i}" for i in range(n_shards)], logs)
+            for key, (processed, failed, _, _) in zip(names, mapped):
+                loaded = shard_failed = 0
+                for per_file in written:
+                    n_loaded, n_failed, fm = per_file[key]
+                    loaded += n_loaded
+                    shard_failed += n_failed
+                    metrics.file(key).add(fm)
+                total_loaded += loaded
+                total_failed += shard_failed
+                failed += shard_failed
+                logs.add(key, "success" if failed == 0 else "partial",
+                         f"processed={processed}, loaded={loaded}, failed={failed}")
+                logs.add(key, "metrics", json.dumps(metrics.end_file(key)))
+
+            t0 = time.perf_counter()
+            if staging is not None:
+                if total_loaded > 0:
+                    etl.swap_offerings(db, staging)
+                else:
+                    etl.drop_offerings_staging(db)
+            # objects count as ingested only once their rows are live (after the swap)
+            if staging is None or total_loaded > 0:
+                for o in keys:
+                    etl.record_ingested(db, o, job_id)
+                db.commit()
+            if total_loaded > 0:
+                etl.publish_price_matrix(db, job_id, logs)
+            metrics.job.seconds["publish"] += time.perf_counter() - t0
+            summary = metrics.summary()
+            etl.finish_job(db, job_id, total_processed, total_loaded, total_failed, summary)
+            metrics.emit("job", {**summary, "status": "success" if total_loaded > 0 else "failed"})
+        except Exception:
+            db.rollback()
+            summary = metrics.summary()
+            etl.fail_job(db, job_id, summary)
+            metrics.emit("job", {**summary, "status": "failed"})
+            # leave the live storeOfferings untouched
+            etl.drop_offerings_staging(db)
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            shutil.rmtree(spill_dir, ignore_errors=True)
+            metrics.untrack()
+            logs.close()
+
+        return {
+            "jobId": job_id,
+            "processed": total_processed,
+            "loaded": total_loaded,
+            "failed": total_failed,
+            "skipped": listed - len(keys),
+            "shards": n_shards,
+            "cache": cache.stats(),
+            "metrics": summary,
+        }
@@ -0,0 +1,208 @@
+# backend/app/services/etl_storage.py
+# Storage backends for the ETL: where source files are listed and read from (S3 or a local folder)
+
+import gzip, io, mmap, os
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import BinaryIO, Dict, List
+import boto3
+from botocore.config import Config
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for .csv.zst sources
+    zstandard = None
+
+CSV_SUFFIXES = (".csv", ".csv.gz", ".csv.zst")
+PARQUET_SUFFIXES = (".parquet",)
+SOURCE_SUFFIXES = CSV_SUFFIXES + PARQUET_SUFFIXES
+
+
+def is_source_key(key: str) -> bool:
+    return key.lower().endswith(SOURCE_SUFFIXES)
+
+
+def is_parquet_key(key: str) -> bool:
+    return key.lower().endswith(PARQUET_SUFFIXES)
+
+
+def decompress(key: str, raw: BinaryIO) -> BinaryIO:
+    """Wrap a raw object stream so reads return the decoded CSV bytes.
+
+    Decompression streams alongside the download; nothing is written to disk.
+    """
+    k = key.lower()
+    if k.endswith(".gz"):
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if k.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{key}: reading .csv.zst sources requires the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    return raw
+
+
+# --- S3 ---
+class S3Storage:
+    """Objects in settings.S3_BUCKET_NAME."""
+
+    def __init__(self, bucket: str = None):
+        self.bucket = bucket or settings.S3_BUCKET_NAME
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def client():
+        # Use env/IAM credentials. One client per process: boto3 clients are thread-safe
+        # and share a connection pool sized for the prefetch workers.
+        pool = max(10, settings.ETL_FETCH_WORKERS * 2)
+        return boto3.client("s3", region_name=settings.AWS_REGION, config=Config(max_pool_connections=pool))
+
+    def list_objects(self, prefix: str) -> List[Dict]:
+        s3 = self.client()
+        token = None
+        out: List[Dict] = []
+        while True:
+            params = {"Bucket": self.bucket, "Prefix": prefix}
+            if token:
+                params["ContinuationToken"] = token
+            resp = s3.list_objects_v2(**params)
+            for o in resp.get("Contents", []):
+                if is_source_key(o["Key"]):
+                    out.append({
+                        "Key": o["Key"],
+                        "LastModified": o["LastModified"],
+                        "ETag": o.get("ETag"),
+                        "Size": o.get("Size"),
+                    })
+            if not resp.get("IsTruncated"):
+                break
+            token = resp.get("NextContinuationToken")
+        return out
+
+    def open(self, key: str) -> BinaryIO:
+        # Streaming body; nothing is buffered to disk
+        return self.client().get_object(Bucket=self.bucket, Key=key)["Body"]
+
+    def open_random(self, key: str) -> BinaryIO:
+        # Seekable view for formats read by offset (Parquet footer, then row groups)
+        return _S3RangeReader(self.client(), self.bucket, key)
+
+
+class _S3RangeReader(io.RawIOBase):
+    """Seekable raw stream over an S3 object; each read is one ranged GET."""
+
+    def __init__(self, s3, bucket: str, key: str):
+        self._s3, self._bucket, self._key = s3, bucket, key
+        self._size = s3.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def readinto(self, b) -> int:
+        n = min(len(b), self._size - self._pos)
+        if n <= 0:
+            return 0
+        rng = f"bytes={self._pos}-{self._pos + n - 1}"
+        data = self._s3.get_object(Bucket=self._bucket, Key=self._key, Range=rng)["Body"].read()
+        b[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+# --- Local folder ---
+class _MmapReader(io.RawIOBase):
+    """Read-only raw stream over a memory-mapped file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            self._mm.madvise(mmap.MADV_SEQUENTIAL)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = min(len(b), len(self._mm) - self._pos)
+        b[:n] = self._mm[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._mm.close()
+        super().close()
+
+
+class LocalStorage:
+    """Files under settings.WATCH_FOLDER; keys are POSIX paths relative to it."""
+
+    def __init__(self, root: str = None):
+        self.root = os.path.abspath(root or settings.WATCH_FOLDER)
+
+    def path(self, key: str) -> str:
+        p = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([p, self.root]) != self.root:
+            raise ValueError(f"key escapes storage root: {key}")
+        return p
+
+    def key(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def list_objects(self, prefix: str) -> List[Dict]:
+        # Same semantics as S3: every file whose key starts with prefix. Only walk the
+        # directory the prefix points into.
+        start = os.path.join(self.root, os.path.dirname(prefix))
+        out: List[Dict] = []
+        for dirpath, _, files in os.walk(start):
+            for name in files:
+                full = os.path.join(dirpath, name)
+                key = self.key(full)
+                if not key.startswith(prefix) or not is_source_key(key):
+                    continue
+                st = os.stat(full)
+                out.append({
+                    "Key": key,
+                    "LastModified": datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+                    # mtime+size stands in for an ETag in the ingestion manifest
+                    "ETag": f"{st.st_mtime_ns:x}-{st.st_size:x}",
+                    "Size": st.st_size,
+                })
+        return out
+
+    def open(self, key: str) -> BinaryIO:
+        p = self.path(key)
+        if os.path.getsize(p) == 0:
+            # empty files cannot be memory-mapped
+            return io.BytesIO(b"")
+        return io.BufferedReader(_MmapReader(p), buffer_size=1 << 20)
+
+    def open_random(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+
+@lru_cache(maxsize=1)
+def get_storage():
+    """Storage backend selected by settings.STORAGE_BACKEND (local|s3)."""
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "s3":
+        return S3Storage()
+    if backend == "local":
+        return LocalStorage()
+    raise RuntimeError(f"unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
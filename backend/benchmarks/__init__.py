@@ -0,0 +1,2 @@
+# backend/benchmarks/__init__.py
+# Performance benchmarks (run with python -m benchmarks.<name>); not part of the app package
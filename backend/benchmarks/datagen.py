@@ -0,0 +1,168 @@
+# backend/benchmarks/datagen.py
+# Seeded synthetic ETL inputs, scaled up from data/foundational_dataset_v1.csv (and shaped like no.27week_special.csv)
+
+import csv, gzip, io, os, random, sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+FOUNDATIONAL = os.path.join(DATA_DIR, "foundational_dataset_v1.csv")
+
+FOUNDATIONAL_HEADER = ["product_id", "product_name", "category_name", "description",
+                       "store_name", "base_price", "default_image_url"]
+SPECIAL_HEADER = FOUNDATIONAL_HEADER + ["discount_type", "final_price"]
+
+# discount labels as they appear in the weekly specials; "Big deal" carries its own final price
+DISCOUNTS = (("Half Price", 0.5), ("30% OFF", 0.3), ("10% OFF", 0.1), ("Big deal", None))
+DISCOUNT_WEIGHTS = (3, 3, 3, 1)
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+def parse_scale(s: str) -> int:
+    """'10k' / '1m' / '10m' (or a plain row count) -> rows."""
+    return SCALES.get(s.lower()) or int(s.replace("_", ""))
+
+
+def _templates() -> Tuple[List[Dict[str, str]], List[str]]:
+    """Distinct products (first row of each) and stores of the foundational dataset."""
+    products: Dict[str, Dict[str, str]] = {}
+    stores: List[str] = []
+    with open(FOUNDATIONAL, encoding="utf-8-sig", newline="") as f:
+        for r in csv.DictReader(f):
+            products.setdefault(r["product_id"], r)
+            if r["store_name"] not in stores:
+                stores.append(r["store_name"])
+    return list(products.values()), stores
+
+
+class CatalogGenerator:
+    """Deterministic catalog of `n_products` products sold by every store.
+
+    Product i reuses template i % len(templates) for its name/category/description with
+    a per-product suffix, so the value distribution matches the real dataset while the
+    key space grows with the scale. Store base prices jitter ±5% around the template price.
+    """
+
+    def __init__(self, n_products: int, seed: int = 42):
+        self.templates, self.stores = _templates()
+        self.n_products = n_products
+        self.seed = seed
+        self._width = max(4, len(str(n_products)))
+
+    def product_id(self, i: int) -> str:
+        return f"P{i + 1:0{self._width}d}"
+
+    def product(self, i: int) -> Dict[str, str]:
+        t = self.templates[i % len(self.templates)]
+        suffix = "" if i < len(self.templates) else f" #{i // len(self.templates)}"
+        pid = self.product_id(i)
+        return {
+            "product_id": pid,
+            "product_name": t["product_name"] + suffix,
+            "category_name": t["category_name"],
+            "description": t["description"] + suffix,
+            "default_image_url": f"/images/p/{pid}.jpg",
+            "base_price": t["base_price"],
+        }
+
+    def base_price(self, rng: random.Random, product: Dict[str, str]) -> float:
+        return round(float(product["base_price"]) * rng.uniform(0.95, 1.05), 2)
+
+    def foundational_rows(self, rows: int) -> Iterator[List[str]]:
+        """`rows` foundational rows: product 0 at every store, then product 1, ..."""
+        rng = random.Random(self.seed)
+        n = 0
+        for i in range(self.n_products):
+            p = self.product(i)
+            for store in self.stores:
+                if n == rows:
+                    return
+                yield [p["product_id"], p["product_name"], p["category_name"], p["description"],
+                       store, f"{self.base_price(rng, p):.2f}", p["default_image_url"]]
+                n += 1
+
+    def special_rows(self, rows: int, zero_rate: float = 0.05) -> Iterator[List[str]]:
+        """`rows` weekly-special rows for random (product, store) pairs.
+
+        About `zero_rate` of them carry no usable discount, which the ETL skips, and
+        repeated pairs exercise the last-write-wins path.
+        """
+        rng = random.Random(self.seed + 1)
+        labels = [d[0] for d in DISCOUNTS]
+        rates = dict(DISCOUNTS)
+        for _ in range(rows):
+            p = self.product(rng.randrange(self.n_products))
+            store = rng.choice(self.stores)
+            base = self.base_price(rng, p)
+            if rng.random() < zero_rate:
+                label, final = "", ""
+            else:
+                label = rng.choices(labels, DISCOUNT_WEIGHTS)[0]
+                rate = rates[label] if rates[label] is not None else rng.uniform(0.15, 0.6)
+                final = f"{round(base * (1 - rate), 2):.2f}"
+            yield [p["product_id"], p["product_name"], p["category_name"], p["description"],
+                   store, f"{base:.2f}", p["default_image_url"], label, final]
+
+
+def _open_out(path: str) -> io.TextIOBase:
+    if path.endswith(".gz"):
+        # fast compression level: generation time should not dominate the benchmark setup
+        return io.TextIOWrapper(gzip.open(path, "wb", compresslevel=1), encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def write_csv(path: str, header: List[str], rows: Iterator[List[str]]) -> int:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    n = 0
+    with _open_out(path) as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(header)
+        for r in rows:
+            w.writerow(r)
+            n += 1
+    return n
+
+
+def generate_specials(out_dir: str, rows: int, files: int = 1, seed: int = 42, suffix: str = ".csv",
+                      n_products: Optional[int] = None, week: int = 27) -> List[str]:
+    """Write `rows` weekly-special rows split over `files` files named like the real uploads.
+
+    Files are reused when they already exist (same rows/files/seed produce the same bytes),
+    so repeated benchmark runs skip generation. Returns the written paths, oldest first.
+    """
+    n_products = n_products or max(100, rows // 10)
+    per_file = -(-rows // files)
+    tag = f"r{rows}-f{files}-s{seed}"
+    paths = []
+    for i in range(files):
+        path = os.path.join(out_dir, tag, f"no.{week + i}week_special{suffix}")
+        paths.append(path)
+        if os.path.exists(path):
+            continue
+        n = min(per_file, rows - i * per_file)
+        # each file gets its own stream so files are independent of the split
+        gen = CatalogGenerator(n_products, seed + 1000 * i)
+        write_csv(path + ".part", SPECIAL_HEADER, gen.special_rows(n))
+        os.replace(path + ".part", path)
+    return paths
+
+
+def generate_foundational(path: str, rows: int, seed: int = 42) -> str:
+    """Write a foundational dataset of `rows` rows (every product at every store)."""
+    _, stores = _templates()
+    gen = CatalogGenerator(-(-rows // len(stores)), seed)
+    write_csv(path, FOUNDATIONAL_HEADER, gen.foundational_rows(rows))
+    return path
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.datagen special|foundational <rows|10k|1m|10m> <out> [files] [seed]
+    if len(sys.argv) < 4:
+        sys.exit("usage: python -m benchmarks.datagen special|foundational <rows> <out dir|file> [files] [seed]")
+    kind, n, out = sys.argv[1], parse_scale(sys.argv[2]), sys.argv[3]
+    n_files = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+    seed = int(sys.argv[5]) if len(sys.argv) > 5 else 42
+    if kind == "foundational":
+        print(generate_foundational(out, n, seed))
+    else:
+        print("\n".join(generate_specials(out, n, n_files, seed)))
@@ -0,0 +1,99 @@
+# backend/benchmarks/schema.py
+# Scratch copy of the ETL tables (as migrated) for benchmark databases
+
+from sqlalchemy import (JSON, BigInteger, Column, DateTime, Index, Integer, MetaData, Numeric, String, Table, Text,
+                        delete)
+from sqlalchemy.engine import Engine
+
+metadata = MetaData()
+
+Table("productCategories", metadata,
+      Column("categoryId", Integer, primary_key=True, autoincrement=True),
+      Column("categoryName", String(100), nullable=False))
+
+# productId is the catalog code (P0001): storeOfferings, store_base_prices and the
+# price matrix reference products by it, and the ETL looks products up by sku
+Table("products", metadata,
+      Column("productId", String(20), primary_key=True),
+      Column("sku", String(50), unique=True),
+      Column("productName", String(200)),
+      Column("categoryName", String(100)),
+      Column("categoryId", Integer),
+      Column("description", Text),
+      Column("defaultImageUrl", String(255)),
+      Column("imageUrl", String(255)),
+      Column("basePrice", Numeric(10, 2)),
+      Index("ix_products_categoryName", "categoryName"))
+
+Table("stores", metadata,
+      Column("storeId", Integer, primary_key=True, autoincrement=True),
+      Column("storeName", String(100), nullable=False),
+      Column("storeKey", String(255), nullable=False, unique=True))
+
+Table("store_base_prices", metadata,
+      Column("id", Integer, primary_key=True, autoincrement=True),
+      Column("productId", String(20), nullable=False),
+      Column("storeId", Integer, nullable=False),
+      Column("basePrice", Numeric(10, 2), nullable=False),
+      Index("ux_store_base_prices_product_store", "productId", "storeId", unique=True))
+
+Table("storeOfferings", metadata,
+      Column("offeringId", Integer, primary_key=True, autoincrement=True),
+      Column("productId", String(20), nullable=False),
+      Column("storeId", Integer, nullable=False),
+      Column("price", Numeric(10, 2)),
+      Column("basePrice", Numeric(10, 2)),
+      Column("offerDetails", String(255)),
+      Column("lastUpdatedAt", DateTime),
+      Index("ux_storeOfferings_product_store", "productId", "storeId", unique=True))
+
+Table("productPriceMatrix", metadata,
+      Column("position", Integer, primary_key=True, autoincrement=False),
+      Column("productId", String(64), nullable=False),
+      Column("categoryName", String(100)),
+      Column("cheapestStore", String(100)),
+      Column("cheapestPrice", Numeric(10, 2)),
+      Column("entry", JSON, nullable=False),
+      Column("jobId", String(64)),
+      Column("builtAt", DateTime, nullable=False),
+      Index("ux_productPriceMatrix_productId", "productId", unique=True),
+      Index("ix_productPriceMatrix_category_position", "categoryName", "position"))
+
+Table("etlJobs", metadata,
+      Column("jobId", Integer, primary_key=True, autoincrement=True),
+      Column("sourceIdentifier", String(255), nullable=False),
+      Column("startTime", DateTime, nullable=False),
+      Column("endTime", DateTime),
+      Column("overallStatus", String(20), nullable=False),
+      Column("totalItemProcessed", Integer),
+      Column("totalItemLoaded", Integer),
+      Column("totalItemFailed", Integer),
+      Column("checkpointKey", String(512)),
+      Column("checkpointRow", BigInteger),
+      Column("checkpointAt", DateTime),
+      Column("metrics", JSON))
+
+Table("etlJobLogs", metadata,
+      Column("logId", Integer, primary_key=True, autoincrement=True),
+      Column("jobId", Integer),
+      Column("timestamp", DateTime, nullable=False),
+      Column("stage", String(20)),
+      Column("status", String(20)),
+      Column("message", Text),
+      Column("sourceKey", String(255)))
+
+Table("etlIngestManifest", metadata,
+      Column("sourceKey", String(512), primary_key=True),
+      Column("eTag", String(128)),
+      Column("objectSize", BigInteger),
+      Column("lastModified", DateTime),
+      Column("jobId", String(64)),
+      Column("ingestedAt", DateTime, nullable=False))
+
+
+def reset(bind: Engine) -> None:
+    """Create missing tables and empty all of them (scratch databases only)."""
+    metadata.create_all(bind)
+    with bind.begin() as conn:
+        for t in reversed(metadata.sorted_tables):
+            conn.execute(delete(t))
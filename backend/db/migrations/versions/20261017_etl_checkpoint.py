@@ -0,0 +1,27 @@
+"""add checkpoint columns to etlJobs for resumable ETL runs
+
+Revision ID: etl_checkpoint_20261017
+Revises: ingest_manifest_20261017
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'etl_checkpoint_20261017'
+down_revision = 'ingest_manifest_20261017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Last committed position of a checkpointed job: object key + rows of it already loaded
+    op.add_column('etlJobs', sa.Column('checkpointKey', sa.String(512), nullable=True))
+    op.add_column('etlJobs', sa.Column('checkpointRow', sa.BigInteger(), nullable=True))
+    op.add_column('etlJobs', sa.Column('checkpointAt', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('etlJobs', 'checkpointAt')
+    op.drop_column('etlJobs', 'checkpointRow')
+    op.drop_column('etlJobs', 'checkpointKey')
@@ -0,0 +1,23 @@
+"""add metrics JSON column to etlJobs for per-stage ETL timings
+
+Revision ID: etl_metrics_20261017
+Revises: store_base_prices_unique_20261017
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'etl_metrics_20261017'
+down_revision = 'store_base_prices_unique_20261017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Stage seconds and counters of the run (see app.services.etl_metrics)
+    op.add_column('etlJobs', sa.Column('metrics', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('etlJobs', 'metrics')
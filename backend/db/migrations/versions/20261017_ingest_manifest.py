@@ -0,0 +1,33 @@
+"""add etlIngestManifest table for incremental ETL
+
+Revision ID: ingest_manifest_20261017
+Revises: store_key_20261017
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'ingest_manifest_20261017'
+down_revision = 'store_key_20261017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One row per source object, rewritten by the ETL job that last ingested it
+    op.create_table(
+        'etlIngestManifest',
+        sa.Column('sourceKey', sa.String(512), primary_key=True),
+        sa.Column('eTag', sa.String(128), nullable=True),
+        sa.Column('objectSize', sa.BigInteger(), nullable=True),
+        sa.Column('lastModified', sa.DateTime(), nullable=True),
+        sa.Column('jobId', sa.String(64), nullable=True),
+        sa.Column('ingestedAt', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_etlIngestManifest_jobId', 'etlIngestManifest', ['jobId'])
+
+
+def downgrade():
+    op.drop_index('ix_etlIngestManifest_jobId', table_name='etlIngestManifest')
+    op.drop_table('etlIngestManifest')
@@ -0,0 +1,39 @@
+"""add unique (productId, storeId) key on storeOfferings
+
+Revision ID: offering_unique_key_20261017
+Revises: add_jobnumber_20251007
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'offering_unique_key_20261017'
+down_revision = 'add_jobnumber_20251007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    dialect = conn.dialect.name
+
+    # 1) Drop duplicate (productId, storeId) rows, keeping the newest offering
+    if dialect == 'mysql':
+        conn.execute(sa.text(
+            "DELETE o1 FROM storeOfferings o1 "
+            "JOIN storeOfferings o2 ON o1.productId = o2.productId "
+            "AND o1.storeId = o2.storeId AND o1.offeringId < o2.offeringId"
+        ))
+    else:
+        conn.execute(sa.text(
+            "DELETE FROM storeOfferings WHERE offeringId NOT IN "
+            "(SELECT MAX(offeringId) FROM storeOfferings GROUP BY productId, storeId)"
+        ))
+
+    # 2) Unique key so the bulk ETL can use INSERT ... ON DUPLICATE KEY UPDATE
+    op.create_index('ux_storeOfferings_product_store', 'storeOfferings', ['productId', 'storeId'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ux_storeOfferings_product_store', table_name='storeOfferings')
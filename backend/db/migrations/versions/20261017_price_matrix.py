@@ -0,0 +1,36 @@
+"""add productPriceMatrix, the product list materialized by each ETL job
+
+Revision ID: price_matrix_20261017
+Revises: etl_metrics_20261017
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'price_matrix_20261017'
+down_revision = 'etl_metrics_20261017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One row per product in list order; `entry` is its finished /products entry
+    # (per-store current and original price, special). Rebuilt via a shadow table.
+    op.create_table(
+        'productPriceMatrix',
+        sa.Column('position', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('productId', sa.String(64), nullable=False),
+        sa.Column('categoryName', sa.String(100), nullable=True),
+        sa.Column('cheapestStore', sa.String(100), nullable=True),
+        sa.Column('cheapestPrice', sa.Numeric(10, 2), nullable=True),
+        sa.Column('entry', sa.JSON(), nullable=False),
+        sa.Column('jobId', sa.String(64), nullable=True),
+        sa.Column('builtAt', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ux_productPriceMatrix_productId', 'productPriceMatrix', ['productId'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ux_productPriceMatrix_productId', table_name='productPriceMatrix')
+    op.drop_table('productPriceMatrix')
@@ -0,0 +1,32 @@
+"""add categoryName indexes and a FULLTEXT index over product names/descriptions
+
+Revision ID: product_search_20261017
+Revises: price_matrix_20261017
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'product_search_20261017'
+down_revision = 'price_matrix_20261017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # /products?category=... on the catalog tables and on the materialized matrix (in list order)
+    op.create_index('ix_products_categoryName', 'products', ['categoryName'])
+    op.create_index('ix_productPriceMatrix_category_position', 'productPriceMatrix', ['categoryName', 'position'])
+
+    # /products?search=... uses MATCH ... AGAINST when this exists (MySQL only; LIKE elsewhere)
+    if op.get_bind().dialect.name == 'mysql':
+        op.create_index('ft_products_name_description', 'products', ['productName', 'description'],
+                        mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        op.drop_index('ft_products_name_description', table_name='products')
+    op.drop_index('ix_productPriceMatrix_category_position', table_name='productPriceMatrix')
+    op.drop_index('ix_products_categoryName', table_name='products')
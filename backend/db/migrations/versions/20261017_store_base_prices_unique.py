@@ -0,0 +1,39 @@
+"""add unique (productId, storeId) key on store_base_prices
+
+Revision ID: store_base_prices_unique_20261017
+Revises: etl_checkpoint_20261017
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'store_base_prices_unique_20261017'
+down_revision = 'etl_checkpoint_20261017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    dialect = conn.dialect.name
+
+    # 1) Drop duplicate (productId, storeId) rows, keeping the newest price
+    if dialect == 'mysql':
+        conn.execute(sa.text(
+            "DELETE p1 FROM store_base_prices p1 "
+            "JOIN store_base_prices p2 ON p1.productId = p2.productId "
+            "AND p1.storeId = p2.storeId AND p1.id < p2.id"
+        ))
+    else:
+        conn.execute(sa.text(
+            "DELETE FROM store_base_prices WHERE id NOT IN "
+            "(SELECT MAX(id) FROM store_base_prices GROUP BY productId, storeId)"
+        ))
+
+    # 2) Unique key so the catalog loader can REPLACE / ON DUPLICATE KEY UPDATE per (product, store)
+    op.create_index('ux_store_base_prices_product_store', 'store_base_prices', ['productId', 'storeId'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ux_store_base_prices_product_store', table_name='store_base_prices')
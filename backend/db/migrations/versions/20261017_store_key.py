@@ -0,0 +1,59 @@
+"""add normalized storeKey column with unique index and backfill
+
+Revision ID: store_key_20261017
+Revises: offering_unique_key_20261017
+Create Date: 2026-10-17 00:00:00.000000
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'store_key_20261017'
+down_revision = 'offering_unique_key_20261017'
+branch_labels = None
+depends_on = None
+
+
+def _normalize_store_name(name):
+    # Must match app.services.etl_service._normalize_store_name
+    return re.sub(r"\s+", "", name or "").lower()
+
+
+def upgrade():
+    conn = op.get_bind()
+    dialect = conn.dialect.name
+    tables = set(sa.inspect(conn).get_table_names())
+
+    # 1) Add nullable storeKey column
+    op.add_column('stores', sa.Column('storeKey', sa.String(255), nullable=True))
+
+    # 2) Backfill in Python so the key matches the ETL normalization exactly.
+    #    Stores that normalize to the same key are merged into the lowest storeId.
+    keep = {}
+    for store_id, name in conn.execute(sa.text('SELECT storeId, storeName FROM stores ORDER BY storeId')):
+        key = _normalize_store_name(name)
+        if key not in keep:
+            keep[key] = store_id
+            conn.execute(sa.text('UPDATE stores SET storeKey = :k WHERE storeId = :id'), {'k': key, 'id': store_id})
+            continue
+        # duplicate: repoint references (skipping rows that would collide), then drop the duplicate
+        upd = 'UPDATE IGNORE' if dialect == 'mysql' else 'UPDATE OR IGNORE'
+        for ref in ('storeOfferings', 'store_base_prices'):
+            if ref in tables:
+                conn.execute(sa.text(f'{upd} {ref} SET storeId = :keep WHERE storeId = :dup'),
+                             {'keep': keep[key], 'dup': store_id})
+                conn.execute(sa.text(f'DELETE FROM {ref} WHERE storeId = :dup'), {'dup': store_id})
+        conn.execute(sa.text('DELETE FROM stores WHERE storeId = :dup'), {'dup': store_id})
+
+    # 3) Make column NOT NULL
+    op.alter_column('stores', 'storeKey', existing_type=sa.String(255), nullable=False)
+
+    # 4) Unique index used by upsert_store lookups and to reject concurrent duplicate inserts
+    op.create_index('ux_stores_storeKey', 'stores', ['storeKey'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ux_stores_storeKey', table_name='stores')
+    op.drop_column('stores', 'storeKey')
@@ -0,0 +1,36 @@
+# backend/tests/conftest.py
+# Shared fixtures: a scratch SQLite database and watch folder, configured before the app is imported
+import os, shutil, sys, tempfile
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="ursaviour-tests-")
+# settings are read when app.core.config is first imported
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_TMP, "test.db")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["WATCH_FOLDER"] = os.path.join(_TMP, "watch")
+os.environ["ETL_SHARDS"] = "1"
+os.environ["ETL_CHECKPOINT_ROWS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+
+
+@pytest.fixture
+def db_engine():
+    """The app's engine over a freshly emptied schema (the benchmark tables)."""
+    from app.db.session import engine
+    from benchmarks import schema
+
+    schema.reset(engine)
+    return engine
+
+
+@pytest.fixture
+def watch_folder():
+    """An empty local-storage root."""
+    from app.core.config import settings
+
+    shutil.rmtree(settings.WATCH_FOLDER, ignore_errors=True)
+    os.makedirs(settings.WATCH_FOLDER)
+    return settings.WATCH_FOLDER
@@ -0,0 +1,132 @@
+# backend/tests/test_catalog_queries.py
+# The product list costs a fixed number of statements, whatever the page size
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def catalog(db_engine, tmp_path):
+    """1,000 products at every store, with one week of specials."""
+    from benchmarks.datagen import CatalogGenerator, generate_foundational
+    from app.services.catalog_loader import load_catalog
+
+    stores = len(CatalogGenerator(1).stores)
+    load_catalog(generate_foundational(str(tmp_path / "catalog.csv"), 1000 * stores))
+    return db_engine
+
+
+def _statements(engine, fn) -> int:
+    """Statements `fn` sends through `engine` (as benchmarks.etl_bench.QueryCounter counts them)."""
+    n = 0
+
+    def count(*args) -> None:
+        nonlocal n
+        n += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return n
+
+
+def test_build_product_list_statements_do_not_grow_with_the_limit(catalog):
+    from app.db.session import SessionLocal
+    from app.services.catalog_cache import build_product_list
+
+    with SessionLocal() as db:
+        # reflect the catalog tables outside the counted calls
+        build_product_list(db, 1)
+        counts = {}
+        for limit in (1, 100, 1000):
+            entries = []
+            counts[limit] = _statements(catalog, lambda: entries.extend(build_product_list(db, limit)))
+            assert len(entries) == limit
+            assert entries[-1]["stores"], "base prices must join to the listed products"
+    assert counts[1] == counts[100] == counts[1000] == 4, counts
+
+
+
+def test_async_product_list_matches_the_sync_one(catalog):
+    import asyncio
+
+    from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
+    from app.services.catalog_cache import build_product_list, build_product_list_async, load_product_list_async
+
+    if AsyncSessionLocal is None:
+        pytest.skip("no async driver installed")
+    with SessionLocal() as db:
+        expected = build_product_list(db, 100)
+        category = expected[0]["category"]
+        expected_category = build_product_list(db, 50, category)
+
+    async def read(fn, *args):
+        async with AsyncSessionLocal() as adb:
+            return await fn(adb, *args)
+
+    out = []
+    n = _statements(async_engine.sync_engine, lambda: out.append(asyncio.run(read(build_product_list_async, 100))))
+    assert out[0] == expected
+    assert n == 4
+    assert asyncio.run(read(load_product_list_async, 50, category)) == expected_category
+
+
+@pytest.mark.parametrize("category, search, after", [
+    ("dairy", None, None),
+    ("BEVERAGES", "water", None),
+    (None, "min wat", "P0200"),
+    (None, "3", None),
+    (None, "#3 pack", None),
+    (None, "Mineral", None),
+    (None, "minral", None),
+    (None, "wa", None),
+    ("Snacks", "standard", "P0500"),
+])
+def test_uncached_page_matches_the_cached_one(catalog, category, search, after):
+    from app.db.session import SessionLocal
+    from app.services.catalog_cache import CatalogSnapshot, build_product_list
+
+    with SessionLocal() as db:
+        snapshot = CatalogSnapshot(None, build_product_list(db), 0.0)
+        for limit in (5, 1000):
+            expected = snapshot.page(limit, category, search, after)
+            assert build_product_list(db, limit, category, search, after) == expected
+    if search is None:
+        assert expected, "the category must be listed"
+
+
+def test_typo_tolerance_is_opt_in(catalog):
+    from app.db.session import SessionLocal
+    from app.services.catalog_cache import CatalogSnapshot, build_product_list
+
+    with SessionLocal() as db:
+        snapshot = CatalogSnapshot(None, build_product_list(db), 0.0)
+    assert snapshot.page(5, search="minral") == []
+    assert [p["name"] for p in snapshot.page(5, search="minral", fuzzy=True)][0].startswith("Mineral")
+
+
+def test_price_matrix_pages_past_the_end_are_empty(catalog):
+    import asyncio
+
+    from sqlalchemy import delete
+
+    from app.db.session import AsyncSessionLocal, SessionLocal
+    from app.services.catalog_cache import PriceMatrix, read_price_matrix, read_price_matrix_async
+
+    async def read_async(*args):
+        async with AsyncSessionLocal() as adb:
+            return await read_price_matrix_async(adb, *args)
+
+    reads = [read_price_matrix] if AsyncSessionLocal is None else \
+        [read_price_matrix, lambda db, *args: asyncio.run(read_async(*args))]
+    with SessionLocal() as db:
+        last = read_price_matrix(db)[-1]["id"]
+        for read in reads:
+            assert len(read(db, 10)) == 10
+            assert read(db, 10, "no such category") == []
+            assert read(db, 10, None, last) == []
+        db.execute(delete(PriceMatrix))
+        db.commit()
+        for read in reads:
+            assert read(db, 10) is None
@@ -0,0 +1,65 @@
+# backend/tests/test_etl_manifest.py
+# Ingestion manifest of full (staged) ETL runs
+import gzip, os
+
+import pytest
+from sqlalchemy import func, select
+
+from conftest import DATA_DIR
+
+
+def _put(root: str, key: str, data: bytes, mtime: float) -> None:
+    path = os.path.join(root, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    os.utime(path, (mtime, mtime))
+
+
+def _count(engine, table) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar_one()
+
+
+def test_failed_staged_run_leaves_objects_to_the_next_incremental_run(db_engine, watch_folder):
+    from app.services import etl_service as etl
+
+    with open(os.path.join(DATA_DIR, "no.27week_special.csv"), "rb") as f:
+        good = f.read()
+    _put(watch_folder, "specials/no.27week_special.csv", good, 1_700_000_000)
+    _put(watch_folder, "specials/no.28week_special.csv.gz", b"not gzip", 1_700_000_100)
+
+    # the good file is loaded into staging before the corrupt one fails the job
+    with pytest.raises(Exception):
+        etl.run_full_etl("specials/", bulk=True)
+    assert _count(db_engine, etl.ETLManifest) == 0
+    assert _count(db_engine, etl.StoreOfferings) == 0
+
+    _put(watch_folder, "specials/no.28week_special.csv.gz", gzip.compress(good), 1_700_000_200)
+    result = etl.run_full_etl("specials/", bulk=True, incremental=True)
+    assert result["skipped"] == 0
+    assert result["loaded"] > 0
+    assert _count(db_engine, etl.StoreOfferings) > 0
+    assert _count(db_engine, etl.ETLManifest) == 2
+
+
+@pytest.mark.parametrize("shards", [1, 2])
+def test_objects_are_recorded_only_once_swapped_in(db_engine, watch_folder, monkeypatch, shards):
+    from app.services import etl_service as etl
+
+    with open(os.path.join(DATA_DIR, "no.27week_special.csv"), "rb") as f:
+        _put(watch_folder, "specials/no.27week_special.csv", f.read(), 1_700_000_000)
+
+    def fail_swap(db, staging):
+        raise RuntimeError("swap failed")
+
+    # every file is loaded (and, sharded, reported by every worker) before the swap
+    with monkeypatch.context() as m:
+        m.setattr(etl, "swap_offerings", fail_swap)
+        with pytest.raises(RuntimeError, match="swap failed"):
+            etl.run_full_etl("specials/", bulk=True, shards=shards)
+    assert _count(db_engine, etl.ETLManifest) == 0
+
+    result = etl.run_full_etl("specials/", bulk=True, incremental=True, shards=shards)
+    assert result["skipped"] == 0
+    assert _count(db_engine, etl.StoreOfferings) == result["loaded"] > 0
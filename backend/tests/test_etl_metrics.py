@@ -0,0 +1,46 @@
+# backend/tests/test_etl_metrics.py
+# Statement counters listen on the ETL's own connection, and only when their counts are kept
+import os, shutil
+
+import pytest
+
+from conftest import DATA_DIR
+
+
+@pytest.fixture
+def specials(db_engine, watch_folder):
+    os.makedirs(os.path.join(watch_folder, "specials"))
+    shutil.copy(os.path.join(DATA_DIR, "no.27week_special.csv"), os.path.join(watch_folder, "specials"))
+    return "specials/"
+
+
+def test_statements_are_counted_on_the_etl_connection_only(db_engine, specials):
+    from app.services import etl_metrics, etl_service as etl
+
+    engine_listeners = len(db_engine.dispatch.before_cursor_execute)
+    seen = []
+
+    def hook(name, payload):
+        seen.append((name, len(db_engine.dispatch.before_cursor_execute)))
+
+    etl_metrics.add_hook(hook)
+    try:
+        result = etl.run_full_etl(specials, bulk=True)
+    finally:
+        etl_metrics.remove_hook(hook)
+    assert result["metrics"]["statements"] > 0
+    # nothing was added to the engine other sessions share, even mid-run
+    assert seen and all(n == engine_listeners for _, n in seen)
+
+
+def test_nothing_listens_when_metrics_are_not_kept(db_engine, specials, monkeypatch):
+    from app.services import etl_metrics, etl_service as etl
+
+    col = etl._col
+    # no etlJobs.metrics column and no hook
+    monkeypatch.setattr(etl, "_col", lambda t, name: None if name == "metrics" else col(t, name))
+    monkeypatch.setattr(etl_metrics, "_hooks", [])
+    monkeypatch.setattr(etl_metrics.ETLMetrics, "track", lambda self, conn: pytest.fail("listener attached"))
+    result = etl.run_full_etl(specials, bulk=True)
+    assert result["loaded"] > 0
+    assert result["metrics"]["statements"] == 0
@@ -0,0 +1,35 @@
+# backend/tests/test_etl_products.py
+# The ETL fills in products it has never seen but leaves catalog-owned columns alone
+import os, shutil
+
+import pytest
+from sqlalchemy import select
+
+from conftest import DATA_DIR
+
+
+def _products(engine):
+    from app.services import etl_service as etl
+
+    cols = etl.Products.c
+    with engine.connect() as conn:
+        return {r.productId: r for r in conn.execute(
+            select(cols.productId, cols.productName, cols.description, cols.categoryId, cols.basePrice))}
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_specials_keep_catalog_names_and_descriptions(db_engine, watch_folder, bulk):
+    from app.services import etl_service as etl
+    from app.services.catalog_loader import load_catalog
+
+    load_catalog(os.path.join(DATA_DIR, "foundational_dataset_v1.csv"))
+    before = _products(db_engine)
+    os.makedirs(os.path.join(watch_folder, "specials"))
+    shutil.copy(os.path.join(DATA_DIR, "no.27week_special.csv"), os.path.join(watch_folder, "specials"))
+
+    assert etl.run_full_etl("specials/", bulk=bulk)["loaded"] > 0
+    after = _products(db_engine)
+    assert after.keys() == before.keys()
+    for pid, row in before.items():
+        assert (after[pid].productName, after[pid].description, after[pid].categoryId) == \
+            (row.productName, row.description, row.categoryId), pid
@@ -0,0 +1,39 @@
+# backend/tests/test_etl_shard.py
+# Sharded ETL runs must load exactly what a single-process run loads
+import os
+
+import pytest
+from sqlalchemy import select
+
+
+def _offerings(engine):
+    from app.services import etl_service as etl
+
+    o, s = etl.StoreOfferings, etl.Stores
+    with engine.connect() as conn:
+        return conn.execute(
+            select(o.c.productId, s.c.storeName, o.c.price, o.c.basePrice, o.c.offerDetails)
+            .join(s, s.c.storeId == o.c.storeId).order_by(o.c.productId, s.c.storeName)
+        ).all()
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_sharded_run_matches_single_process(db_engine, watch_folder, columnar):
+    from benchmarks.datagen import generate_specials
+    from app.services import etl_service as etl
+
+    # few products over several files: the same (product, store) recurs across files and shards
+    paths = generate_specials(os.path.join(watch_folder, "specials"), 900, files=3, n_products=40)
+    for i, path in enumerate(paths):
+        os.utime(path, (1_700_000_000 + i, 1_700_000_000 + i))
+    prefix = "specials/" + os.path.basename(os.path.dirname(paths[0])) + "/"
+
+    single = etl.run_full_etl(prefix, bulk=True, columnar=columnar)
+    expected = _offerings(db_engine)
+    sharded = etl.run_full_etl(prefix, bulk=True, columnar=columnar, shards=3)
+
+    assert _offerings(db_engine) == expected
+    for k in ("processed", "loaded", "failed"):
+        assert sharded[k] == single[k], k
+    assert sharded["metrics"]["rowsParsed"] == single["metrics"]["rowsParsed"]
+    assert sharded["metrics"]["rowsLoaded"] == single["metrics"]["rowsLoaded"]
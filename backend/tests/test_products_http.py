@@ -0,0 +1,74 @@
+# backend/tests/test_products_http.py
+# HTTP validators of the products list
+import asyncio, os
+from typing import Dict, Tuple
+
+import pytest
+
+from conftest import DATA_DIR
+
+
+def _get(path: str, query: str = "", headers: Tuple[Tuple[str, str], ...] = ()) -> Tuple[int, Dict[str, str]]:
+    """Status and headers of one GET through the ASGI app."""
+    from app.main import app
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+             "root_path": "", "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+             "client": ("test", 1), "server": ("test", 80)}
+    out: Dict = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            out["status"] = message["status"]
+            out["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+
+    asyncio.run(app(scope, receive, send))
+    return out["status"], out["headers"]
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_catalog_reload_invalidates_the_etag(db_engine, monkeypatch, cached):
+    from app.core.config import settings
+    from app.services.catalog_cache import catalog_cache
+    from app.services.catalog_loader import load_catalog
+
+    monkeypatch.setattr(settings, "CATALOG_CACHE_ENABLED", cached)
+    catalog_cache.invalidate()
+    source = os.path.join(DATA_DIR, "foundational_dataset_v1.csv")
+    load_catalog(source)
+
+    status, headers = _get("/api/v1/products/", "limit=5")
+    assert status == 200
+    etag = headers["etag"]
+    assert _get("/api/v1/products/", "limit=5", (("If-None-Match", etag),))[0] == 304
+
+    load_catalog(source)
+    # the cache picks the reload up on its next check
+    catalog_cache.refresh()
+    status, headers = _get("/api/v1/products/", "limit=5", (("If-None-Match", etag),))
+    assert status == 200
+    assert headers["etag"] != etag
+
+
+def test_rebuilt_snapshot_with_new_content_gets_a_new_etag(db_engine, monkeypatch):
+    from sqlalchemy import delete, update
+
+    from app.core.config import settings
+    from app.services.catalog_cache import PriceMatrix, Products, catalog_cache
+    from app.services.catalog_loader import load_catalog
+
+    monkeypatch.setattr(settings, "CATALOG_CACHE_ENABLED", True)
+    catalog_cache.invalidate()
+    load_catalog(os.path.join(DATA_DIR, "foundational_dataset_v1.csv"))
+    etag = _get("/api/v1/products/", "limit=5")[1]["etag"]
+
+    # products changed outside any ETL job, picked up by a max_age rebuild
+    with db_engine.begin() as conn:
+        conn.execute(update(Products).values(productName="Renamed"))
+        conn.execute(delete(PriceMatrix))
+    assert catalog_cache.refresh(force=True)
+    assert _get("/api/v1/products/", "limit=5", (("If-None-Match", etag),))[0] == 200
@@ -47,6 +47,10 @@ def transform_data(text):
     return transformed_data
 
 #4 Load data
+def store_key_of(name):
+    # same normalization as the backend ETL's stores.storeKey
+    return re.sub(r"\s+", "", name or "").lower()
+
 def load_data_to_db(data):
     conn = None
     try:
@@ -57,8 +61,9 @@ def load_data_to_db(data):
         cursor.execute("SELECT productId, productName FROM products")
         product_map = {p['productName']: p['productId'] for p in cursor.fetchall()}
 
-        cursor.execute("SELECT storeId, storeName FROM stores")
-        store_map = {s['storeName']: s['storeId'] for s in cursor.fetchall()}
+        # stores are deduplicated on the normalized storeKey (lowercase, no whitespace)
+        cursor.execute("SELECT storeId, storeKey FROM stores")
+        store_map = {s['storeKey']: s['storeId'] for s in cursor.fetchall()}
 
         for item in data:
             if item['productName'] not in product_map:
@@ -66,9 +71,10 @@ def load_data_to_db(data):
                 product_map[item['productName']] = cursor.lastrowid
                 print(f"   -> new product added: {item['productName']}")
 
-            if item['storeName'] not in store_map:
-                cursor.execute("INSERT INTO stores (storeName) VALUES (%s)", (item['storeName'],))
-                store_map[item['storeName']] = cursor.lastrowid
+            store_key = store_key_of(item['storeName'])
+            if store_key not in store_map:
+                cursor.execute("INSERT INTO stores (storeName, storeKey) VALUES (%s, %s)", (item['storeName'], store_key))
+                store_map[store_key] = cursor.lastrowid
                 print(f"   -> new store added: {item['storeName']}")
 
         conn.commit()
@@ -79,7 +85,7 @@ def load_data_to_db(data):
         offerings_to_insert = []
         for item in data:
             productId = product_map.get(item['productName'])
-            storeId = store_map.get(item['storeName'])
+            storeId = store_map.get(store_key_of(item['storeName']))
 
             if productId and storeId:
                 offerings_to_insert.append((